@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Check that the errors of a CLAPI batch import are mapped back to the
+objects that queued the failing lines: a batch is flushed with ParseSender,
+the local stand-in of the import, and the results flagged by report() are
+compared with the expected ones.
+
+    python benchmarks/batch_check.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import collection_path  # noqa: E402
+
+
+def check():
+    """
+    Messages for each expectation not met.
+    """
+    collection_path()
+    from ansible_collections.community.centreon.plugins.module_utils import centreon_batch
+
+    problems = list()
+
+    def expect(what, got, wanted):
+        if got != wanted:
+            problems.append('%s: got %r, expected %r' % (what, got, wanted))
+
+    batch = centreon_batch.Batch()
+    with batch.labelled('host-ok'):
+        batch.record('HOST', 'add', ['host-ok', 'host-ok', '10.0.0.1', '', 'Central', ''])
+        batch.record('HOST', 'setmacro', ['host-ok', 'MACRO', 'value'])
+    with batch.labelled('host-unknown'):
+        batch.record('HOST', 'setparam', ['host-unknown', 'notes', 'x'])
+        batch.record('HOST', 'bogus', ['host-unknown'])
+    with batch.labelled('host-malformed'):
+        batch.record('', 'setparam', ['host-malformed', 'notes', 'x'])
+    expect('pending creations', batch.is_pending('HOST', ['host-ok']), True)
+
+    sender = centreon_batch.ParseSender()
+    failed = centreon_batch.failed_labels(batch.flush(sender))
+    expect('failed objects', sorted(failed), ['host-malformed', 'host-unknown'])
+    expect('errors of host-unknown', failed.get('host-unknown'), ['HOST;BOGUS;host-unknown: Unknown action bogus'])
+    expect('errors of host-malformed', len(failed.get('host-malformed') or []), 1)
+    expect('lines imported', [(obj, action) for obj, action, values in sender.lines],
+           [('HOST', 'add'), ('HOST', 'setmacro'), ('HOST', 'setparam')])
+    expect('entries left after flush', len(batch), 0)
+    expect('pending creations after flush', batch.is_pending('HOST', ['host-ok']), False)
+
+    results = [dict(name=name, changed=True, msg=['changed']) for name in ('host-ok', 'host-unknown', 'host-malformed')]
+    expect('report', centreon_batch.report(results, failed, lambda r: r['name']), True)
+    expect('failed results', [r['name'] for r in results if r.get('failed')], ['host-unknown', 'host-malformed'])
+    expect('messages of host-unknown', results[1]['msg'], ['changed'] + failed['host-unknown'])
+    expect('messages of host-ok', results[0]['msg'], ['changed'])
+
+    def unused_sender(text):
+        problems.append('empty batch sent: %r' % text)
+        return dict()
+
+    expect('empty flush', batch.flush(unused_sender), [])
+    return problems
+
+
+def main():
+    problems = check()
+    for problem in problems:
+        print('FAIL   %s' % problem)
+    if not problems:
+        print('OK     batch import errors mapped to their objects')
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
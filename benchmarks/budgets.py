@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Check the Centreon API calls of single-object scenarios against the golden
+call counts in budgets.json: any call kind above its budget, or not in it,
+fails the check, as does a scenario without a budget.
+
+    python benchmarks/budgets.py
+    python benchmarks/budgets.py --update host_create    # record new budgets
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_centreon import FakeCentreonServer  # noqa: E402
+from harness import ModuleRunner  # noqa: E402
+from scenarios import HOSTGROUPS, HOSTTEMPLATES, SERVICETEMPLATES, macros, seed_base, seed_hosts, Size  # noqa: E402
+
+BUDGETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'budgets.json')
+
+HOST = dict(name='host00000', alias='host00000', ipaddr='10.0.0.1', instance='Central', applycfg=False,
+            hosttemplates=[dict(name=t) for t in HOSTTEMPLATES], hostgroups=[dict(name=HOSTGROUPS[0])],
+            params=[dict(name='notes', value='budget')], macros=macros(10))
+
+SERVICE = dict(host='host00000', name='Cpu', servicetemplate=SERVICETEMPLATES[2], applycfg=False,
+               params=[dict(name='normal_check_interval', value='5')], macros=macros(10))
+
+
+def module_task(module, args, warmup=()):
+    """
+    Scenario running `warmup` tasks uncounted, then the `module` task.
+    """
+    def run(server, runner):
+        for warmup_module, warmup_args in warmup:
+            runner.run(warmup_module, warmup_args)
+        server.centreon.reset_stats()
+        return runner.run(module, args)
+    return run
+
+
+def helper_call(call):
+    """
+    Scenario calling a centreon_utils helper on the existing host00000.
+    """
+    def run(server, runner):
+        from ansible_collections.community.centreon.plugins.module_utils import centreon_client, centreon_utils
+        runner.reset()
+        centreon = centreon_client.connect(server.url, 'admin', 'centreon')
+        s, host = centreon.hosts.get('host00000')
+        if not s:
+            return dict(failed=True, msg='Unable to get host00000: %s' % host)
+        server.centreon.reset_stats()
+        data = list()
+        try:
+            changed = call(centreon_utils, host, data)
+        except Exception as e:
+            return dict(failed=True, msg='%s: %s' % (type(e).__name__, e))
+        return dict(changed=changed, msg=data)
+    return run
+
+
+SCENARIOS = {
+    'host_create': module_task('centreon_host', HOST),
+    'host_rerun': module_task('centreon_host', HOST, warmup=[('centreon_host', HOST)]),
+    'host_macro_change': module_task(
+        'centreon_host', dict(HOST, macros=[dict(m, value='changed') if m['name'] == 'MACRO00' else m
+                                            for m in HOST['macros']]),
+        warmup=[('centreon_host', HOST)]),
+    'service_create': module_task('centreon_service', SERVICE),
+    'service_rerun': module_task('centreon_service', SERVICE, warmup=[('centreon_service', SERVICE)]),
+    'utils_update_macros_unchanged': helper_call(
+        lambda utils, host, data: utils.update_macros(host, HOST['macros'], data)),
+    'utils_update_params_unchanged': helper_call(
+        lambda utils, host, data: utils.update_params(host, HOST['params'], data)),
+}
+
+# Scenarios whose host00000 already holds the macros and params of HOST
+HELPERS = ('utils_update_macros_unchanged', 'utils_update_params_unchanged')
+
+
+def record(name):
+    with FakeCentreonServer() as server:
+        if name.startswith(('service', 'utils')):
+            seed_hosts(server.centreon, Size(1, 0))
+        else:
+            seed_base(server.centreon, Size(1, 0))
+        if name in HELPERS:
+            host = server.centreon.objects['HOST']['host00000']
+            host.macros.update((m['name'], (m['value'], '0', '')) for m in HOST['macros'])
+            host.params.update((p['name'], p['value']) for p in HOST['params'])
+        result = SCENARIOS[name](server, ModuleRunner(server.url))
+        calls = dict(('%s %s' % k, v) for k, v in sorted(server.centreon.calls.items()))
+    return result, calls
+
+
+def compare(budget, calls):
+    """
+    Messages for the call kinds above their budget.
+    """
+    over = list()
+    for kind, count in sorted(calls.items()):
+        if count > budget.get(kind, 0):
+            over.append('%s: %d calls, budget %d' % (kind, count, budget.get(kind, 0)))
+    total, allowed = sum(calls.values()), sum(budget.values())
+    if total > allowed:
+        over.append('total: %d calls, budget %d' % (total, allowed))
+    return over
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help='Scenarios to check (default: all): %s' % ', '.join(sorted(SCENARIOS)))
+    parser.add_argument('--update', action='store_true', help='Write the recorded calls as the new budgets')
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit('Unknown scenarios: %s' % ', '.join(sorted(unknown)))
+
+    with open(BUDGETS) as f:
+        budgets = json.load(f)
+
+    failed = False
+    for name in args.scenarios or sorted(SCENARIOS):
+        result, calls = record(name)
+        if result.get('failed'):
+            print('%-32s ERROR  %s' % (name, result.get('msg')))
+            failed = True
+            continue
+        if args.update:
+            budgets[name] = calls
+            print('%-32s RECORDED %d calls' % (name, sum(calls.values())))
+            continue
+        if name not in budgets:
+            failed = True
+            print('%-32s NO BUDGET (%d calls), record it with --update' % (name, sum(calls.values())))
+            continue
+        over = compare(budgets[name], calls)
+        if over:
+            failed = True
+            print('%-32s OVER   %s' % (name, '; '.join(over)))
+        elif sum(calls.values()) < sum(budgets[name].values()):
+            print('%-32s OK     %d calls, under the budget of %d: lower it with --update'
+                  % (name, sum(calls.values()), sum(budgets[name].values())))
+        else:
+            print('%-32s OK     %d calls' % (name, sum(calls.values())))
+
+    if args.update:
+        with open(BUDGETS, 'w') as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write('\n')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
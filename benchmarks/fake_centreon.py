@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+In-process stand-in for the Centreon REST API (authenticate and the CLAPI
+wrapper), serving the CLAPI actions centreonapi and the modules use from an
+in-memory configuration, with a configurable latency per request.
+"""
+
+import collections
+import itertools
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Values of the 'add' action, per object
+ADD_FIELDS = {
+    'HOST': ('name', 'alias', 'address', 'template', 'instance', 'hostgroup'),
+    'HTPL': ('name', 'alias', 'address', 'template', 'instance', 'hostgroup'),
+    'SERVICE': ('host name', 'description', 'template'),
+    'STPL': ('description', 'alias', 'template'),
+    'CMD': ('name', 'type', 'line'),
+    'HG': ('name', 'alias'),
+    'CONTACT': ('name', 'alias'),
+    'CG': ('name', 'alias'),
+    'INSTANCE': ('name', 'ip address'),
+}
+
+# Columns of the 'show' action, per object
+SHOW_FIELDS = {
+    'HOST': ('id', 'name', 'alias', 'address', 'activate'),
+    'HTPL': ('id', 'name', 'alias', 'address', 'activate'),
+    'SERVICE': ('host id', 'host name', 'id', 'description', 'check command', 'check command arg',
+                'normal check interval', 'retry check interval', 'max check attempts',
+                'active checks enabled', 'passive checks enabled', 'activate'),
+    'STPL': ('id', 'description', 'alias', 'check command', 'check command arg',
+             'normal check interval', 'retry check interval', 'max check attempts',
+             'active checks enabled', 'passive checks enabled'),
+    'CMD': ('id', 'name', 'type', 'line'),
+    'HG': ('id', 'name', 'alias'),
+    'CONTACT': ('id', 'name', 'alias'),
+    'CG': ('id', 'name', 'alias'),
+    'INSTANCE': ('id', 'name', 'localhost', 'ip address', 'activate', 'status', 'init script', 'bin',
+                 'stats bin', 'ssh port'),
+}
+
+# Parameters shown as a 'show' column
+PARAM_COLUMNS = {'check_command': 'check command', 'check_command_arguments': 'check command arg'}
+
+# Relations handled by the get<relation>/add<relation>/set<relation>/del<relation> actions
+RELATIONS = ('template', 'hostgroup', 'contact', 'contactgroup', 'parent', 'child', 'member', 'host')
+
+# Poller actions, sent without object
+POLLER_ACTIONS = ('applycfg', 'pollergenerate', 'pollertest', 'cfgmove', 'pollerreload', 'pollerrestart')
+
+
+class ClapiError(Exception):
+
+    def __init__(self, message, code=400):
+        super(ClapiError, self).__init__(message)
+        self.code = code
+
+
+def macro_name(name):
+    name = str(name).strip('$').upper()
+    for prefix in ('_HOST', '_SERVICE'):
+        if name.startswith(prefix):
+            return name[len(prefix):]
+    return name
+
+
+def as_list(values):
+    if values is None:
+        return []
+    if isinstance(values, (list, tuple)):
+        return [str(v) for v in values]
+    return str(values).split(';')
+
+
+class FakeObject(object):
+
+    def __init__(self, oid, row):
+        self.id = oid
+        self.row = row
+        self.params = dict()
+        self.macros = collections.OrderedDict()
+        self.relations = collections.defaultdict(list)
+
+
+class FakeCentreon(object):
+    """
+    In-memory Centreon configuration answering CLAPI calls, and counting them.
+    """
+
+    def __init__(self):
+        self.objects = collections.defaultdict(collections.OrderedDict)
+        self.ids = itertools.count(1)
+        self.lock = threading.RLock()
+        self.tokens = set()
+        self.reset_stats()
+
+    def count(self, bytes_in=0, bytes_out=0):
+        with self.lock:
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def reset_stats(self):
+        self.calls = collections.Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    #### Configuration
+    @staticmethod
+    def key(obj, values):
+        return ';'.join(values[:2] if obj == 'SERVICE' else values[:1])
+
+    def find(self, obj, key):
+        try:
+            return self.objects[obj][key]
+        except KeyError:
+            raise ClapiError('Object not found: %s' % key)
+
+    def add(self, obj, values):
+        values = as_list(values)
+        key = self.key(obj, values)
+        if key in self.objects[obj]:
+            raise ClapiError('Object already exists (%s)' % key, 409)
+        fields = dict(zip(ADD_FIELDS.get(obj, ('name',)), values))
+        item = FakeObject(next(self.ids), dict((c, '') for c in SHOW_FIELDS.get(obj, ('id', 'name'))))
+        item.row.update((k, v) for k, v in fields.items() if k in item.row)
+        item.row['id'] = str(item.id)
+        if 'activate' in item.row:
+            item.row['activate'] = '1'
+        if obj == 'SERVICE':
+            item.row['host id'] = str(self.find('HOST', values[0]).id)
+        for relation in ('template', 'hostgroup'):
+            if fields.get(relation):
+                item.relations[relation] = [n for n in fields[relation].split('|') if n]
+        if obj in ('SERVICE', 'STPL') and fields.get('template'):
+            item.params['template'] = fields['template']
+        if fields.get('instance'):
+            self.find('INSTANCE', fields['instance']).relations['host'].append(values[0])
+        self.objects[obj][key] = item
+        return item
+
+    def seed(self, obj, values, params=None, macros=None, **relations):
+        """
+        Create an object directly, outside of the counted API calls.
+        """
+        with self.lock:
+            item = self.add(obj, values)
+            for name, value in (params or {}).items():
+                self.setparam(obj, item, name, value)
+            for name, value in (macros or {}).items():
+                item.macros[macro_name(name)] = (str(value), '0', '')
+            for relation, names in relations.items():
+                item.relations[relation] = list(names)
+            return item
+
+    def setparam(self, obj, item, name, value):
+        item.params[name] = value
+        column = PARAM_COLUMNS.get(name, name)
+        if column in item.row and column not in ('id', 'name', 'description', 'host name'):
+            item.row[column] = value
+
+    def show(self, obj, values):
+        search = values[0] if values else None
+        rows = list()
+        for key, item in self.objects[obj].items():
+            if search and search not in key:
+                continue
+            rows.append(dict(item.row))
+        return rows
+
+    def getmacro(self, obj, item):
+        prefix = '$_SERVICE%s$' if obj in ('SERVICE', 'STPL') else '%s'
+        return [{'macro name': prefix % name, 'macro value': value, 'is_password': password,
+                 'description': description, 'source': 'direct'}
+                for name, (value, password, description) in item.macros.items()]
+
+    def relation(self, obj, item, action, relation, names):
+        current = item.relations[relation]
+        if action == 'get':
+            related = {'template': 'HTPL' if obj in ('HOST', 'HTPL') else 'STPL', 'hostgroup': 'HG',
+                       'contact': 'CONTACT', 'contactgroup': 'CG', 'parent': 'HOST', 'child': 'HOST',
+                       'member': 'HOST', 'host': 'HOST'}[relation]
+            rows = list()
+            for name in current:
+                other = self.objects[related].get(name)
+                rows.append({'id': str(other.id) if other else '', 'name': name})
+            return rows
+        names = [n for n in names.split('|') if n]
+        if action == 'set':
+            current[:] = names
+        elif action == 'add':
+            current.extend(n for n in names if n not in current)
+        else:
+            current[:] = [n for n in current if n not in names]
+        return []
+
+    def applytpl(self, item):
+        created = list()
+        for template in item.relations['template']:
+            htpl = self.objects['HTPL'].get(template)
+            for stpl in htpl.relations['service'] if htpl else []:
+                alias = self.find('STPL', stpl).row['alias'] or stpl
+                if '%s;%s' % (item.row['name'], alias) not in self.objects['SERVICE']:
+                    self.add('SERVICE', [item.row['name'], alias, stpl])
+                    created.append(alias)
+        return created
+
+    #### CLAPI
+    def call(self, action, obj, values):
+        action = str(action).lower()
+        with self.lock:
+            self.calls[(obj or '-', action)] += 1
+            return self._call(action, obj, as_list(values))
+
+    def _call(self, action, obj, values):
+        if action in POLLER_ACTIONS:
+            if not any(str(p.id) == values[0] or p.row['name'] == values[0]
+                       for p in self.objects['INSTANCE'].values()):
+                raise ClapiError('Unknown poller %s' % values[0])
+            return ['OK']
+        if obj not in SHOW_FIELDS:
+            raise ClapiError('Unknown object %s' % obj)
+        if action == 'show':
+            return self.show(obj, values)
+        if action == 'add':
+            self.add(obj, values)
+            return []
+        size = 2 if obj == 'SERVICE' else 1
+        item = self.find(obj, self.key(obj, values))
+        args = values[size:]
+        if action == 'del':
+            del self.objects[obj][self.key(obj, values)]
+            if obj == 'HOST':
+                for key in [k for k in self.objects['SERVICE'] if k.startswith(values[0] + ';')]:
+                    del self.objects['SERVICE'][key]
+            return []
+        if action == 'setparam':
+            self.setparam(obj, item, args[0], args[1] if len(args) > 1 else '')
+            return []
+        if action == 'getparam':
+            names = args[0].split('|')
+            if len(names) == 1:
+                return [item.params.get(names[0], item.row.get(names[0], ''))]
+            return ['%s: %s' % (n, item.params.get(n, item.row.get(n, ''))) for n in names]
+        if action in ('enable', 'disable'):
+            item.row['activate'] = '1' if action == 'enable' else '0'
+            return []
+        if action == 'getmacro':
+            return self.getmacro(obj, item)
+        if action == 'setmacro':
+            item.macros[macro_name(args[0])] = (args[1] if len(args) > 1 else '',
+                                                args[2] if len(args) > 2 and args[2] else '0',
+                                                args[3] if len(args) > 3 else '')
+            return []
+        if action == 'delmacro':
+            if '|' in args[0]:
+                raise ClapiError('delmacro takes a single macro name: %s' % args[0])
+            item.macros.pop(macro_name(args[0]), None)
+            return []
+        if action == 'setinstance':
+            for poller in self.objects['INSTANCE'].values():
+                if item.row['name'] in poller.relations['host']:
+                    poller.relations['host'].remove(item.row['name'])
+            self.find('INSTANCE', args[0]).relations['host'].append(item.row['name'])
+            return []
+        if action == 'gethosts' and obj == 'INSTANCE':
+            return [{'id': str(self.objects['HOST'][h].id), 'name': h,
+                     'address': self.objects['HOST'][h].row['address']}
+                    for h in item.relations['host'] if h in self.objects['HOST']]
+        if action == 'applytpl':
+            return self.applytpl(item)
+        for verb in ('get', 'add', 'set', 'del'):
+            if action.startswith(verb) and action[len(verb):] in RELATIONS:
+                return self.relation(obj, item, verb, action[len(verb):], args[0] if args else '')
+        raise ClapiError('Unknown action %s for %s' % (action, obj))
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, code, content):
+        body = json.dumps(content).encode('utf-8')
+        self.server.centreon.count(bytes_out=len(body))
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        centreon = self.server.centreon
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        centreon.count(bytes_in=len(body))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        query = parse_qs(urlparse(self.path).query)
+        action = query.get('action', [''])[0]
+        if action == 'authenticate':
+            token = uuid.uuid4().hex
+            with centreon.lock:
+                centreon.calls[('-', 'authenticate')] += 1
+                centreon.tokens.add(token)
+            return self.reply(200, {'authToken': token})
+        if action != 'action' or query.get('object', [''])[0] != 'centreon_clapi':
+            return self.reply(404, {'message': 'Unknown endpoint'})
+        if self.headers.get('centreon-auth-token') not in centreon.tokens:
+            return self.reply(401, {'code': 401, 'message': 'Unauthorized'})
+        try:
+            data = json.loads(body.decode('utf-8') or '{}')
+            result = centreon.call(data.get('action'), data.get('object'), data.get('values'))
+        except ClapiError as e:
+            return self.reply(e.code, str(e))
+        except Exception as e:
+            return self.reply(500, 'Internal error: %s' % e)
+        return self.reply(200, {'result': result})
+
+
+class FakeCentreonServer(object):
+    """
+    HTTP server running FakeCentreon in a background thread, usable as a
+    context manager. `url` is what the modules take as their url option.
+    """
+
+    def __init__(self, centreon=None, latency=0.0):
+        self.centreon = centreon or FakeCentreon()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.centreon = self.centreon
+        self.httpd.latency = latency
+        self.url = 'http://127.0.0.1:%d/centreon' % self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Run the collection modules in-process against FakeCentreonServer and
+measure the API calls and wall-clock time they cost.
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def collection_path():
+    """
+    Make the repository importable as ansible_collections.community.centreon.
+    """
+    try:
+        import ansible_collections.community.centreon  # noqa: F401
+        return
+    except ImportError:
+        pass
+    path = tempfile.mkdtemp(prefix='centreon-bench-')
+    os.makedirs(os.path.join(path, 'ansible_collections', 'community'))
+    os.symlink(ROOT, os.path.join(path, 'ansible_collections', 'community', 'centreon'))
+    sys.path.insert(0, path)
+    for name in [n for n in sys.modules if n == 'ansible_collections' or n.startswith('ansible_collections.')]:
+        del sys.modules[name]
+
+
+class ModuleRunner(object):
+    """
+    Run module main() functions as Ansible would, one task at a time.
+
+    By default each task starts like a fresh module process: it logs in
+    again and shares nothing with the previous task. With `controller`, tasks
+    share the clients and caches as under controller-side execution.
+    """
+
+    def __init__(self, url, controller=False):
+        collection_path()
+        from ansible.module_utils import basic
+        from ansible_collections.community.centreon.plugins.module_utils import centreon_client
+        self.basic = basic
+        self.client = centreon_client
+        self.url = url
+        self.controller = controller
+        self.client.REUSE_CLIENTS = controller
+
+    def reset(self):
+        from centreonapi.webservice import Webservice
+        if not self.controller:
+            self.client._clients.clear()
+            self.client._tokens.clear()
+            self.client._object_caches.clear()
+            webservice = Webservice.getInstance(self.url, 'admin', 'centreon')
+            webservice.auth_token = None
+
+    def run(self, module, args):
+        self.reset()
+        args = dict(args, url=self.url, username='admin', password='centreon')
+        self.basic._ANSIBLE_ARGS = json.dumps({'ANSIBLE_MODULE_ARGS': args}).encode('utf-8')
+        main = importlib.import_module('ansible_collections.community.centreon.plugins.modules.%s' % module).main
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            try:
+                main()
+            except SystemExit:
+                pass
+            except Exception as e:
+                return dict(failed=True, msg='%s: %s' % (type(e).__name__, e))
+        try:
+            return json.loads(out.getvalue())
+        except ValueError:
+            return dict(failed=True, msg='Unparsable module output: %s' % out.getvalue()[-500:])
+
+
+class Measurement(object):
+
+    def __init__(self, name, objects, seconds, calls, bytes_in, bytes_out, changed, failed):
+        self.name = name
+        self.objects = objects
+        self.seconds = seconds
+        self.calls = calls
+        self.bytes_in = bytes_in
+        self.bytes_out = bytes_out
+        self.changed = changed
+        self.failed = failed
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def per_object(self, value):
+        return float(value) / self.objects if self.objects else 0.0
+
+    def as_dict(self):
+        return dict(name=self.name, objects=self.objects, seconds=round(self.seconds, 4),
+                    seconds_per_object=round(self.per_object(self.seconds), 6),
+                    calls=self.total_calls, calls_per_object=round(self.per_object(self.total_calls), 3),
+                    bytes_in=self.bytes_in, bytes_out=self.bytes_out, changed=self.changed, failed=self.failed,
+                    by_action=dict(('%s %s' % k, v) for k, v in sorted(self.calls.items())))
+
+
+def measure(server, runner, scenario, size):
+    """
+    Seed the fake Centreon, run the warm-up tasks of `scenario`, then time
+    and count its measured tasks.
+    """
+    scenario.seed(server.centreon, size)
+    tasks = scenario.tasks(size)
+    if scenario.rerun:
+        for module, args in tasks:
+            runner.run(module, args)
+    server.centreon.reset_stats()
+    changed = failed = 0
+    start = time.perf_counter()
+    for module, args in tasks:
+        result = runner.run(module, args)
+        changed += bool(result.get('changed'))
+        if result.get('failed'):
+            failed += 1
+            if failed == 1:
+                sys.stderr.write('%s: %s failed: %s\n' % (scenario.name, module, result.get('msg')))
+    seconds = time.perf_counter() - start
+    centreon = server.centreon
+    return Measurement(scenario.name, len(tasks), seconds, dict(centreon.calls), centreon.bytes_in,
+                       centreon.bytes_out, changed, failed)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measure the API calls and the time the Centreon modules cost per object,
+against an in-process fake Centreon.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --hosts 50 --macros 5 --latency 0.005 host_create host_rerun
+    python benchmarks/run.py --controller --json results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_centreon import FakeCentreonServer  # noqa: E402
+from harness import ModuleRunner, measure  # noqa: E402
+from scenarios import SCENARIOS, Size  # noqa: E402
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help='Scenarios to run (default: all): %s' % ', '.join(s.name for s in SCENARIOS))
+    parser.add_argument('--hosts', type=int, default=500, help='Number of hosts (and services) per scenario')
+    parser.add_argument('--macros', type=int, default=20, help='Number of macros per host, service and template')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every API request')
+    parser.add_argument('--controller', action='store_true',
+                        help='Share clients between tasks, as with controller-side execution')
+    parser.add_argument('--json', metavar='FILE', help='Also write the results to FILE as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = [s for s in SCENARIOS if not args.scenarios or s.name in args.scenarios]
+    unknown = set(args.scenarios) - set(s.name for s in SCENARIOS)
+    if unknown:
+        sys.exit('Unknown scenarios: %s' % ', '.join(sorted(unknown)))
+    size = Size(args.hosts, args.macros)
+
+    print('%-24s %8s %8s %10s %10s %12s %8s' % ('scenario', 'objects', 'calls', 'calls/obj', 'seconds',
+                                               'ms/obj', 'changed'))
+    results = list()
+    for scenario in scenarios:
+        with FakeCentreonServer(latency=args.latency) as server:
+            m = measure(server, ModuleRunner(server.url, controller=args.controller), scenario, size)
+        results.append(m.as_dict())
+        print('%-24s %8d %8d %10.2f %10.3f %12.3f %8d%s' % (
+            m.name, m.objects, m.total_calls, m.per_object(m.total_calls), m.seconds,
+            1000 * m.per_object(m.seconds), m.changed, '  (%d failed)' % m.failed if m.failed else ''))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(size=size._asdict(), latency=args.latency, controller=args.controller,
+                           results=results), f, indent=2, sort_keys=True)
+    return 1 if any(r['failed'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
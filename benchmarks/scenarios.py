@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark scenarios: the configuration seeded in the fake Centreon and the
+module tasks measured against it, for a given size.
+"""
+
+import collections
+
+Size = collections.namedtuple('Size', ('hosts', 'macros'))
+
+HOSTTEMPLATES = ('OS-Linux-SNMP-custom', 'App-Monitoring-Centreon-Central-custom', 'generic-active-host')
+HOSTGROUPS = ('Linux-Servers', 'Web-Servers')
+SERVICETEMPLATES = ('generic-active-service', 'Base-Ping-LAN', 'OS-Linux-Cpu-SNMP')
+
+
+def seed_base(centreon, size):
+    centreon.seed('INSTANCE', ['Central', '127.0.0.1'])
+    for name in HOSTTEMPLATES:
+        centreon.seed('HTPL', [name, name, ''], macros={'SNMPCOMMUNITY': 'public'})
+    for name in HOSTGROUPS:
+        centreon.seed('HG', [name, name])
+    centreon.seed('CMD', ['check_ping', 'check', '$USER1$/check_ping -H $HOSTADDRESS$'])
+    centreon.seed('STPL', [SERVICETEMPLATES[0], SERVICETEMPLATES[0], ''], params={'check_command': 'check_ping'})
+    for name in SERVICETEMPLATES[1:]:
+        centreon.seed('STPL', [name, name, SERVICETEMPLATES[0]], macros={'WARNING': '80', 'CRITICAL': '90'})
+
+
+def seed_hosts(centreon, size):
+    seed_base(centreon, size)
+    for i in range(size.hosts):
+        centreon.seed('HOST', [host_name(i), host_name(i), '10.0.%d.%d' % (i // 250, i % 250 + 1),
+                               HOSTTEMPLATES[0], 'Central', ''])
+
+
+def host_name(i):
+    return 'host%05d' % i
+
+
+def macros(count, prefix='MACRO'):
+    return [dict(name='%s%02d' % (prefix, m), value='value-%d' % m) for m in range(count)]
+
+
+def host_tasks(size):
+    return [('centreon_host', dict(
+        name=host_name(i), alias=host_name(i), ipaddr='10.0.%d.%d' % (i // 250, i % 250 + 1),
+        instance='Central', applycfg=False,
+        hosttemplates=[dict(name=HOSTTEMPLATES[0]), dict(name=HOSTTEMPLATES[1])],
+        hostgroups=[dict(name=HOSTGROUPS[0])],
+        params=[dict(name='notes', value='benchmark')],
+        macros=macros(size.macros)))
+        for i in range(size.hosts)]
+
+
+def service_tasks(size):
+    return [('centreon_service', dict(
+        host=host_name(i), name='Cpu', servicetemplate=SERVICETEMPLATES[2], applycfg=False,
+        params=[dict(name='normal_check_interval', value='5')],
+        macros=macros(size.macros)))
+        for i in range(size.hosts)]
+
+
+def command_tasks(size):
+    return [('centreon_command', dict(
+        name='check_bench_%04d' % i, type='check', applycfg=False,
+        line='$USER1$/check_bench -H $HOSTADDRESS$ -i %d' % i))
+        for i in range(max(size.hosts // 10, 1))]
+
+
+def servicetemplate_tasks(size):
+    return [('centreon_servicetemplate', dict(
+        name='Bench-%04d' % i, alias='Bench %d' % i, template=SERVICETEMPLATES[1], applycfg=False,
+        macros=macros(size.macros)))
+        for i in range(max(size.hosts // 10, 1))]
+
+
+def hostgroup_tasks(size):
+    return [('centreon_hostgroup', dict(hg=[dict(name='bench-hg-%04d' % i, alias='Bench %d' % i)]))
+            for i in range(max(size.hosts // 10, 1))]
+
+
+def poller_tasks(size):
+    return [('centreon_poller', dict(instance='Central', action='applycfg')) for i in range(10)]
+
+
+class Scenario(object):
+
+    def __init__(self, name, seed, tasks, rerun=False):
+        self.name = name
+        self.seed = seed
+        self.tasks = tasks
+        self.rerun = rerun
+
+
+SCENARIOS = [
+    Scenario('host_create', seed_base, host_tasks),
+    Scenario('host_rerun', seed_base, host_tasks, rerun=True),
+    Scenario('service_create', seed_hosts, service_tasks),
+    Scenario('service_rerun', seed_hosts, service_tasks, rerun=True),
+    Scenario('command_create', seed_base, command_tasks),
+    Scenario('command_rerun', seed_base, command_tasks, rerun=True),
+    Scenario('servicetemplate_create', seed_base, servicetemplate_tasks),
+    Scenario('servicetemplate_rerun', seed_base, servicetemplate_tasks, rerun=True),
+    Scenario('hostgroup_create', seed_base, hostgroup_tasks),
+    Scenario('hostgroup_rerun', seed_base, hostgroup_tasks, rerun=True),
+    Scenario('poller_applycfg', seed_base, poller_tasks),
+]
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.community.centreon.plugins.plugin_utils.centreon_action import CentreonActionModule
+
+
+class ActionModule(CentreonActionModule):
+    pass
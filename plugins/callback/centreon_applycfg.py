@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: centreon_applycfg
+    type: aggregate
+    short_description: Apply deferred Centreon poller configurations once per play
+    description:
+      - Collects the pollers reported as dirty by Centreon modules run with C(applycfg=deferred)
+        and applies the configuration of each of them once, when the play ends.
+      - A successful M(community.centreon.centreon_poller) task is a flush point, the pollers it
+        applied are no longer dirty.
+    requirements:
+      - enable in configuration
+      - Python Centreon API
+    options:
+      url:
+        description:
+          - Centreon URL to apply the configurations on.
+          - The modules return their C(url) masked when it contains a C(no_log) value, such as the
+            password. The pollers are matched to this URL instead, it is only required in that case.
+        env:
+          - name: CENTREON_URL
+        ini:
+          - section: callback_centreon_applycfg
+            key: url
+      username:
+        description: Centreon API username used to apply the configurations
+        env:
+          - name: CENTREON_USERNAME
+        ini:
+          - section: callback_centreon_applycfg
+            key: username
+      password:
+        description: Centreon API username's password
+        env:
+          - name: CENTREON_PASSWORD
+        ini:
+          - section: callback_centreon_applycfg
+            key: password
+      validate_certs:
+        description: If C(no), SSL certificates will not be validated.
+        type: bool
+        default: yes
+        env:
+          - name: CENTREON_VALIDATE_CERTS
+        ini:
+          - section: callback_centreon_applycfg
+            key: validate_certs
+      token_cache:
+        description: Reuse the API authentication token cached on local disk by the modules.
+        type: bool
+        default: no
+        env:
+          - name: CENTREON_TOKEN_CACHE
+        ini:
+          - section: callback_centreon_applycfg
+            key: token_cache
+'''
+
+from ansible.plugins.callback import CallbackBase
+
+from ansible_collections.community.centreon.plugins.module_utils import centreon_applycfg, centreon_client
+
+# What no_log values are replaced with in the module results
+MASK = '********'
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'community.centreon.centreon_applycfg'
+    CALLBACK_NEEDS_WHITELIST = True
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super(CallbackModule, self).__init__()
+        # server key -> names of the pollers waiting for an applycfg
+        self.dirty = dict()
+        # server key -> url reported by the modules
+        self.urls = dict()
+
+    def _collect(self, result):
+        for res in [result] + result.get('results', []):
+            if not isinstance(res, dict):
+                continue
+            deferred = res.get(centreon_applycfg.RESULT_KEY)
+            if deferred:
+                key = deferred.get('server') or centreon_applycfg.server_key(deferred['url'])
+                self.urls[key] = deferred['url']
+                self.dirty.setdefault(key, set()).update(deferred['pollers'])
+            applied = res.get(centreon_applycfg.APPLIED_KEY)
+            if applied:
+                key = applied.get('server') or centreon_applycfg.server_key(applied['url'])
+                self.dirty.get(key, set()).difference_update(applied['pollers'])
+
+    def _url(self, key):
+        """
+        Url of the server `key`: the callback's own when it is that server,
+        else the one reported by the modules unless no_log masked it.
+        """
+        url = self.get_option('url')
+        if url and centreon_applycfg.server_key(url) == key:
+            return url
+        url = self.urls.get(key)
+        if url and MASK not in url:
+            return url
+        return None
+
+    def _flush(self):
+        dirty, self.dirty = self.dirty, dict()
+        for key, pollers in sorted(dirty.items()):
+            if not pollers:
+                continue
+            url = self._url(key)
+            if url is None:
+                self._display.warning("Centreon pollers %s on %s still need an applycfg: the url is masked in the "
+                                      "module results, set it in the centreon_applycfg callback options"
+                                      % (sorted(pollers), self.urls.get(key)))
+                continue
+            username = self.get_option('username')
+            password = self.get_option('password')
+            if not username or not password:
+                self._display.warning("Centreon pollers %s on %s still need an applycfg: no credentials "
+                                      "configured for the centreon_applycfg callback" % (sorted(pollers), url))
+                continue
+            try:
+                centreon = centreon_client.connect(url, username, password,
+                                                   check_ssl=self.get_option('validate_certs'),
+                                                   token_cache=self.get_option('token_cache'))
+                for name in sorted(pollers):
+                    st, poller = centreon.pollers.get(name)
+                    if not st:
+                        self._display.warning("Centreon poller %s not found on %s" % (name, url))
+                        continue
+                    s, m, run = centreon_applycfg.shared_applycfg(poller, url)
+                    if s:
+                        self._display.display("Centreon: applied configuration on poller %s" % name)
+                    else:
+                        self._display.warning("Centreon: unable to apply configuration on poller %s: %s" % (name, m))
+            except Exception as e:
+                self._display.warning("Centreon: unable to apply configuration on %s: %s" % (url, e))
+
+    def v2_runner_on_ok(self, result):
+        self._collect(result._result)
+
+    def v2_playbook_on_play_start(self, play):
+        self._flush()
+
+    def v2_playbook_on_stats(self, stats):
+        self._flush()
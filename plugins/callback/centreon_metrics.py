@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: centreon_metrics
+    type: aggregate
+    short_description: Write Centreon automation metrics as a Prometheus textfile
+    description:
+      - Aggregates the activity of the Centreon modules over a playbook run (tasks and objects changed
+        or unchanged, API calls and their latency per action, time per phase, configurations applied
+        per poller) and writes it at the end of the run, atomically, in the Prometheus text format for
+        the node exporter textfile collector.
+      - API calls, latencies and phases are taken from the C(perf) result of the modules, set
+        C(perf=yes) on the Centreon tasks to get them, for instance with C(module_defaults).
+    requirements:
+      - enable in configuration
+    options:
+      textfile:
+        description: Path of the C(.prom) file written, in the directory of the node exporter textfile collector.
+        required: True
+        env:
+          - name: CENTREON_METRICS_TEXTFILE
+        ini:
+          - section: callback_centreon_metrics
+            key: textfile
+      job:
+        description: Value of the C(job) label of every metric, the playbook file name by default.
+        env:
+          - name: CENTREON_METRICS_JOB
+        ini:
+          - section: callback_centreon_metrics
+            key: job
+'''
+
+import collections
+import os
+import tempfile
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+from ansible_collections.community.centreon.plugins.module_utils import centreon_applycfg, centreon_perf
+
+PREFIX = 'centreon_ansible_'
+
+# Result lists of the loop items (results) and of the objects of the bulk modules
+OBJECT_KEYS = ('results', 'hosts', 'services')
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def labels(**kwargs):
+    return '{%s}' % ','.join('%s="%s"' % (k, escape(v)) for k, v in sorted(kwargs.items()))
+
+
+def nested(result):
+    """
+    Loop items and objects of the bulk modules in `result`, at any depth.
+    """
+    for key in OBJECT_KEYS:
+        for item in result.get(key) or []:
+            if isinstance(item, dict):
+                yield item
+                for sub in nested(item):
+                    yield sub
+
+
+class Metrics(object):
+    """
+    Aggregated activity of the Centreon modules, rendered as Prometheus text.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.tasks = collections.Counter()
+        self.objects = collections.Counter()
+        self.calls = collections.Counter()
+        self.phases = collections.Counter()
+        self.bytes = collections.Counter()
+        self.latency = dict()
+        self.applycfg = collections.Counter()
+        self.applycfg_seconds = collections.Counter()
+
+    def add(self, module, status, result):
+        self.tasks[(module, status)] += 1
+        items = list(nested(result))
+        objects = [item for item in items if not any(item.get(key) for key in OBJECT_KEYS)]
+        for item in objects or [result]:
+            outcome = 'failed' if item.get('failed') else 'changed' if item.get('changed') else 'unchanged'
+            self.objects[(module, outcome)] += 1
+        for res in [result] + items:
+            if res.get('perf'):
+                self.add_perf(module, res['perf'])
+            for run in res.get(centreon_applycfg.RUN_KEY) or []:
+                key = (run.get('poller'), 'true' if run.get('shared') else 'false')
+                self.applycfg[key] += 1
+                self.applycfg_seconds[key] += run.get('duration') or 0
+
+    def add_perf(self, module, perf):
+        for action, count in (perf.get('calls') or {}).items():
+            self.calls[(module, action)] += count
+        for phase, seconds in (perf.get('phases') or {}).items():
+            self.phases[(module, phase)] += seconds
+        self.bytes['sent'] += perf.get('bytes_sent') or 0
+        self.bytes['received'] += perf.get('bytes_received') or 0
+        for action, latency in (perf.get('latency') or {}).items():
+            buckets, seconds = self.latency.get(action) or ([0] * (len(centreon_perf.BUCKETS) + 1), 0.0)
+            for i, count in enumerate(latency.get('buckets') or []):
+                if i < len(buckets):
+                    buckets[i] += count
+            self.latency[action] = (buckets, seconds + (latency.get('seconds') or 0))
+
+    def render(self, job):
+        lines = list()
+
+        def metric(name, kind, text, samples):
+            lines.append('# HELP %s%s %s' % (PREFIX, name, text))
+            lines.append('# TYPE %s%s %s' % (PREFIX, name, kind))
+            for suffix, sample_labels, value in samples:
+                lines.append('%s%s%s%s %s' % (PREFIX, name, suffix, labels(job=job, **sample_labels), value))
+
+        metric('last_run_timestamp_seconds', 'gauge', 'End of the last run.',
+               [('', {}, round(time.time(), 3))])
+        metric('last_run_duration_seconds', 'gauge', 'Duration of the last run.',
+               [('', {}, round(time.time() - self.started, 3))])
+        metric('tasks', 'gauge', 'Centreon tasks of the last run by module and status.',
+               [('', dict(module=m, status=s), n) for (m, s), n in sorted(self.tasks.items())])
+        metric('objects', 'gauge', 'Objects handled in the last run by module and outcome.',
+               [('', dict(module=m, state=s), n) for (m, s), n in sorted(self.objects.items())])
+        metric('api_calls', 'gauge', 'Centreon API calls of the last run by module and action.',
+               [('', dict(module=m, action=a), n) for (m, a), n in sorted(self.calls.items())])
+        metric('api_phase_seconds', 'gauge', 'Seconds spent in API calls in the last run by module and phase.',
+               [('', dict(module=m, phase=p), round(s, 6)) for (m, p), s in sorted(self.phases.items())])
+        metric('api_bytes', 'gauge', 'Size of the API requests and responses of the last run.',
+               [('', dict(direction=d), n) for d, n in sorted(self.bytes.items())])
+        samples = list()
+        for action, (buckets, seconds) in sorted(self.latency.items()):
+            cumulative = 0
+            for le, count in zip([str(b) for b in centreon_perf.BUCKETS] + ['+Inf'], buckets):
+                cumulative += count
+                samples.append(('_bucket', dict(action=action, le=le), cumulative))
+            samples.append(('_sum', dict(action=action), round(seconds, 6)))
+            samples.append(('_count', dict(action=action), cumulative))
+        metric('api_call_duration_seconds', 'histogram', 'Latency of the API calls of the last run by action.',
+               samples)
+        metric('applycfg', 'gauge', 'Configuration exports of the last run by poller, shared when joined.',
+               [('', dict(poller=p, shared=s), n) for (p, s), n in sorted(self.applycfg.items())])
+        metric('applycfg_seconds', 'gauge', 'Seconds spent exporting configurations in the last run by poller.',
+               [('', dict(poller=p, shared=s), round(d, 6)) for (p, s), d in sorted(self.applycfg_seconds.items())])
+        return '\n'.join(lines) + '\n'
+
+
+def write_atomic(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.%s.' % os.path.basename(path), dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.chmod(tmp, 0o644)
+        os.rename(tmp, path)
+    except Exception:
+        os.unlink(tmp)
+        raise
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'community.centreon.centreon_metrics'
+    CALLBACK_NEEDS_WHITELIST = True
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super(CallbackModule, self).__init__()
+        self.metrics = Metrics()
+        self.playbook = None
+
+    def _module(self, result):
+        action = result._task.action or ''
+        name = action.split('.')[-1]
+        return name if name.startswith('centreon_') else None
+
+    def _collect(self, result, status):
+        module = self._module(result)
+        if module is None:
+            return
+        if status == 'ok' and result._result.get('changed'):
+            status = 'changed'
+        self.metrics.add(module, status, result._result)
+
+    def v2_playbook_on_start(self, playbook):
+        self.playbook = os.path.basename(playbook._file_name)
+
+    def v2_runner_on_ok(self, result):
+        self._collect(result, 'ok')
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._collect(result, 'failed')
+
+    def v2_playbook_on_stats(self, stats):
+        path = self.get_option('textfile')
+        try:
+            write_atomic(path, self.metrics.render(self.get_option('job') or self.playbook or 'ansible'))
+        except Exception as e:
+            self._display.warning("centreon_metrics: unable to write %s: %s" % (path, e))
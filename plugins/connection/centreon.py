@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: centreon
+    short_description: Persistent HTTP session to the Centreon API
+    description:
+      - Keeps one authenticated HTTP session to the Centreon web API open for the whole play, with
+        keep-alive and TLS session reuse, and runs the CLAPI calls of the Centreon modules through it.
+      - Modelled on the persistent C(httpapi) connection, the modules run on the controller and send
+        their calls to the connection over its local socket.
+    requirements:
+      - requests
+    options:
+      host:
+        description: Centreon web server name or address
+        default: inventory_hostname
+        vars:
+          - name: inventory_hostname
+          - name: ansible_host
+      url:
+        description:
+          - Centreon URL, defaults to C(https://<host>/centreon)
+        vars:
+          - name: centreon_url
+          - name: ansible_centreon_url
+      remote_user:
+        description: Centreon API username
+        vars:
+          - name: ansible_user
+          - name: centreon_api_user
+      password:
+        description: Centreon API username's password
+        vars:
+          - name: ansible_password
+          - name: centreon_api_pass
+      validate_certs:
+        description: If C(no), SSL certificates will not be validated.
+        type: bool
+        default: yes
+        vars:
+          - name: ansible_centreon_validate_certs
+      persistent_connect_timeout:
+        type: int
+        description:
+          - Seconds to wait when trying to initially establish the session before timing out.
+        default: 30
+        ini:
+          - section: persistent_connection
+            key: connect_timeout
+        env:
+          - name: ANSIBLE_PERSISTENT_CONNECT_TIMEOUT
+        vars:
+          - name: ansible_connect_timeout
+      persistent_command_timeout:
+        type: int
+        description:
+          - Seconds to wait for an API call to return before timing out.
+        default: 30
+        ini:
+          - section: persistent_connection
+            key: command_timeout
+        env:
+          - name: ANSIBLE_PERSISTENT_COMMAND_TIMEOUT
+        vars:
+          - name: ansible_command_timeout
+      persistent_log_messages:
+        type: bool
+        description:
+          - Log all messages exchanged with the connection to the Ansible log file.
+        default: False
+        ini:
+          - section: persistent_connection
+            key: log_messages
+        env:
+          - name: ANSIBLE_PERSISTENT_LOG_MESSAGES
+        vars:
+          - name: ansible_persistent_log_messages
+'''
+
+EXAMPLES = '''
+- hosts: centreon_central
+  connection: community.centreon.centreon
+  vars:
+    centreon_url: https://centreon.company.net/centreon
+    centreon_api_user: ansible_api
+    centreon_api_pass: "{{ vault_centreon_api_pass }}"
+  tasks:
+    - community.centreon.centreon_hostgroup:
+        url: "{{ centreon_url }}"
+        hg:
+          - name: Linux-Servers
+'''
+
+import json
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.plugins.connection import NetworkConnectionBase, ensure_connect
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+
+class Connection(NetworkConnectionBase):
+
+    transport = 'community.centreon.centreon'
+    has_pipelining = True
+
+    def __init__(self, play_context, new_stdin, *args, **kwargs):
+        super(Connection, self).__init__(play_context, new_stdin, *args, **kwargs)
+        self._session = None
+        self._auth_token = None
+
+    @property
+    def _url(self):
+        return (self.get_option('url') or 'https://%s/centreon' % self.get_option('host')).rstrip('/')
+
+    def _connect(self):
+        if self.connected:
+            return
+        if requests is None:
+            raise AnsibleConnectionFailure('The centreon connection requires the python requests library')
+        self._session = requests.Session()
+        self._session.verify = self.get_option('validate_certs')
+        self._login()
+        self._connected = True
+
+    def _login(self):
+        response = self._session.post(
+            self._url + '/api/index.php?action=authenticate',
+            data={'username': self.get_option('remote_user'), 'password': self.get_option('password')},
+            timeout=self.get_option('persistent_connect_timeout'),
+        )
+        if response.status_code != 200:
+            raise AnsibleConnectionFailure('Unable to authenticate on %s: %s %s'
+                                           % (self._url, response.status_code, response.reason))
+        self._auth_token = response.json()['authToken']
+        self.queue_message('vvvv', 'authenticated on %s' % self._url)
+
+    def _post_clapi(self, payload):
+        return self._session.post(
+            self._url + '/api/index.php?action=action&object=centreon_clapi',
+            headers={'Content-Type': 'application/json', 'centreon-auth-token': self._auth_token},
+            data=payload,
+            timeout=self.get_option('persistent_command_timeout'),
+        )
+
+    @ensure_connect
+    def call_clapi(self, action=None, obj=None, values=None):
+        """
+        Same contract as centreonapi Webservice.call_clapi(): returns the API
+        status and either the decoded response or a JSON encoded error.
+        """
+        data = {}
+        if action is not None:
+            data['action'] = action
+        if obj is not None:
+            data['object'] = obj
+        if values is not None:
+            data['values'] = values
+        payload = json.dumps(data)
+        self._log_messages('clapi %s %s' % (action, obj))
+
+        response = self._post_clapi(payload)
+        if response.status_code == 401:
+            # Token expired server-side: log in again once and replay the call
+            self._login()
+            response = self._post_clapi(payload)
+
+        if response.ok:
+            return True, response.json()
+        return False, json.dumps(['error',
+                                  {'message': '%s %s' % (response.status_code, response.reason)},
+                                  {'code': str(response.status_code),
+                                   'reason': str(response.reason),
+                                   'text': response.text}])
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        self._auth_token = None
+        super(Connection, self).close()
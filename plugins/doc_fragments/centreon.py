@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+
+    # Connection and instrumentation options of every Centreon module
+    DOCUMENTATION = r'''
+options:
+  url:
+    description:
+      - Centreon URL
+    required: True
+  username:
+    description:
+      - Centreon API username
+    required: True
+  password:
+    description:
+      - Centreon API username's password
+    required: True
+  validate_certs:
+    type: bool
+    default: yes
+    description:
+      - If C(no), SSL certificates will not be validated.
+  token_cache:
+    type: bool
+    default: no
+    description:
+      - If C(yes), reuse the API authentication token cached on local disk for this URL and username,
+        instead of logging in on every task.
+      - When the task runs locally through the collection's action plugin, the login is only shared by
+        the loop items of the task, as Ansible starts a new worker for each task. This option is the
+        only way to reuse it across tasks.
+  token_cache_ttl:
+    type: int
+    default: 3600
+    description:
+      - Lifetime in seconds of a cached authentication token.
+  perf:
+    type: bool
+    default: no
+    description:
+      - If C(yes), return in C(perf) the API calls made by the task per action, the time spent logging
+        in, looking up the poller, reading, writing and applying the configuration, and the size of
+        the API requests and responses.
+  profile:
+    type: path
+    description:
+      - Directory where to write a cProfile dump (C(.pstats)) of the task and a summary with its top
+        memory allocation sites (C(.txt)), named after the module and the object. The
+        C(CENTREON_PROFILE_DIR) environment variable does the same for every Centreon task.
+'''
+
+    # Modules applying the configuration of pollers
+    APPLYCFG = r'''
+options:
+  applycfg_debounce:
+    type: float
+    default: 0
+    description:
+      - Seconds to wait before applying the configuration, so that concurrent tasks applying the same poller
+        from this machine share a single export. Concurrent applies on a poller are always serialized.
+'''
+
+    # Modules reading the centreon_sync_cache mirror
+    MIRROR = r'''
+options:
+  mirror:
+    type: path
+    description:
+      - Path of a SQLite mirror written by M(community.centreon.centreon_sync_cache). When it is fresh
+        enough and was synchronized from the same C(url), existence and current values are read from
+        it instead of the API.
+  mirror_max_age:
+    type: int
+    default: 300
+    description:
+      - Maximum age in seconds of the mirror, an older mirror is ignored and the API is read instead.
+'''
+
+    # Modules caching their API reads
+    OBJECT_CACHE = r'''
+options:
+  object_cache:
+    type: bool
+    default: no
+    description:
+      - If C(yes), keep the answers of the API reads in memory and update them with the changes made
+        by the task, instead of reading back what was just written. When the action plugin runs in
+        the controller process, the answers are shared by the following loop items of the task, not
+        by the next tasks, which run in another worker.
+'''
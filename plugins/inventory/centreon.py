@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: centreon
+    short_description: Centreon inventory source
+    description:
+      - Builds the inventory from the hosts configured in Centreon, with one group per hostgroup,
+        host template and poller.
+      - Exposes the macros and the parameters of each host as host variables.
+      - Uses a YAML configuration file that ends with C(centreon.yml) or C(centreon.yaml).
+    requirements:
+      - Python Centreon API
+    extends_documentation_fragment:
+      - constructed
+      - inventory_cache
+    options:
+      plugin:
+        description: Token that ensures this is a source file for the plugin.
+        required: True
+        choices: ['centreon', 'community.centreon.centreon']
+      url:
+        description: Centreon URL
+        required: True
+        env:
+          - name: CENTREON_URL
+      username:
+        description: Centreon API username
+        required: True
+        env:
+          - name: CENTREON_USERNAME
+      password:
+        description: Centreon API username's password
+        required: True
+        env:
+          - name: CENTREON_PASSWORD
+      validate_certs:
+        description: If C(no), SSL certificates will not be validated.
+        type: bool
+        default: yes
+      token_cache:
+        description: Reuse the API authentication token cached on local disk by the modules.
+        type: bool
+        default: no
+      hostgroup_prefix:
+        description: Prefix of the groups built from the hostgroups.
+        default: ''
+      hosttemplate_prefix:
+        description: Prefix of the groups built from the host templates.
+        default: 'template_'
+      poller_prefix:
+        description: Prefix of the groups built from the pollers.
+        default: 'poller_'
+      want_macros:
+        description: Fetch the macros of each host into C(centreon_macros). Password macros are left out.
+        type: bool
+        default: yes
+      want_params:
+        description: Fetch the parameters of each host into C(centreon_params).
+        type: bool
+        default: no
+      include_disabled:
+        description: Also add the disabled hosts.
+        type: bool
+        default: no
+      max_workers:
+        description: Number of API calls run at the same time to fetch the hosts details.
+        type: int
+        default: 8
+      incremental:
+        description:
+          - "When the inventory is rebuilt (C(--flush-cache), C(meta: refresh_inventory)), reuse the
+            templates, macros and parameters of the cached inventory for the hosts whose name, alias,
+            address and status did not change, and only fetch them for the other hosts."
+          - Hostgroups and pollers are always fetched again. A change of templates, macros or parameters
+            alone is not seen until the cached inventory expires.
+        type: bool
+        default: no
+'''
+
+EXAMPLES = '''
+# centreon.yml
+plugin: community.centreon.centreon
+url: https://centreon.company.net/centreon
+username: ansible_api
+want_params: yes
+cache: yes
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.ansible/tmp/centreon_inventory
+cache_timeout: 3600
+incremental: yes
+keyed_groups:
+  - key: centreon_macros.ENVIRONMENT | default('none')
+    prefix: env
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible.errors import AnsibleError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+
+from ansible_collections.community.centreon.plugins.module_utils import centreon_client, centreon_mirror
+
+try:
+    from centreonapi.webservice.configuration.host import Host
+except ImportError:
+    Host = None
+
+# Host properties compared to decide if the details of a cached host are still valid
+SUMMARY = ('id', 'name', 'alias', 'address', 'activate')
+
+
+def host_details(host, want_macros, want_params):
+    """
+    Templates, macros and params of a host, as plain data to be cached.
+    """
+    details = dict(templates=[], macros={}, params={})
+    s, templates = host.gettemplate()
+    if not s:
+        raise Exception('Unable to get templates of %s: %s' % (host.name, templates))
+    details['templates'] = sorted(templates or {})
+    if want_macros:
+        s, macros = host.getmacro()
+        if not s:
+            raise Exception('Unable to get macros of %s: %s' % (host.name, macros))
+        details['macros'] = dict((m.name, m.value) for m in (macros or {}).values()
+                                 if str(m.is_password) != '1')
+    if want_params:
+        s, params = host.getparams()
+        if not s:
+            raise Exception('Unable to get params of %s: %s' % (host.name, params))
+        details['params'] = params or {}
+    return details
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = 'community.centreon.centreon'
+
+    def verify_file(self, path):
+        return super(InventoryModule, self).verify_file(path) and \
+            path.endswith(('centreon.yml', 'centreon.yaml'))
+
+    def _fetch(self, previous):
+        if Host is None:
+            raise AnsibleError('The centreon inventory plugin requires the Python Centreon API')
+        centreon = centreon_client.connect(self.get_option('url'), self.get_option('username'),
+                                           self.get_option('password'),
+                                           check_ssl=self.get_option('validate_certs'),
+                                           token_cache=self.get_option('token_cache'))
+        webservice = centreon.hosts.webservice
+
+        def clapi(action, obj, values=None):
+            return centreon_mirror.clapi(webservice, action, obj, values)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.get_option('max_workers'))) as pool:
+            all_hosts, pollers, hostgroups = [f.result() for f in [
+                pool.submit(clapi, 'show', 'HOST'),
+                pool.submit(clapi, 'show', 'INSTANCE'),
+                pool.submit(clapi, 'show', 'HG')]]
+
+            hosts = dict()
+            for h in all_hosts:
+                if self.get_option('include_disabled') or str(h.get('activate')) == '1':
+                    hosts[h['name']] = dict((k, h.get(k)) for k in SUMMARY)
+
+            poller_hosts = [(p['name'], pool.submit(clapi, 'gethosts', 'INSTANCE', p['name'])) for p in pollers]
+            members = [(hg['name'], pool.submit(clapi, 'getmember', 'HG', hg['name'])) for hg in hostgroups]
+            for poller, future in poller_hosts:
+                for h in future.result():
+                    if h.get('name') in hosts:
+                        hosts[h['name']]['poller'] = poller
+            for hostgroup, future in members:
+                for h in future.result():
+                    if h.get('name') in hosts:
+                        hosts[h['name']].setdefault('hostgroups', []).append(hostgroup)
+
+            # Only fetch the details of new and changed hosts
+            todo = list()
+            for name, host in hosts.items():
+                cached = previous.get(name) if self.get_option('incremental') else None
+                if cached and all(cached.get(k) == host.get(k) for k in SUMMARY):
+                    host.update(templates=cached['templates'], macros=cached['macros'], params=cached['params'])
+                else:
+                    todo.append(name)
+
+            want_macros = self.get_option('want_macros')
+            want_params = self.get_option('want_params')
+            details = [(name, pool.submit(host_details, Host(hosts[name]), want_macros, want_params))
+                       for name in todo]
+            for name, future in details:
+                hosts[name].update(future.result())
+        return hosts
+
+    def _populate(self, hosts):
+        strict = self.get_option('strict')
+        for name, host in sorted(hosts.items()):
+            self.inventory.add_host(name)
+            self.inventory.set_variable(name, 'ansible_host', host.get('address'))
+            self.inventory.set_variable(name, 'centreon_id', host.get('id'))
+            self.inventory.set_variable(name, 'centreon_alias', host.get('alias'))
+            self.inventory.set_variable(name, 'centreon_poller', host.get('poller'))
+            self.inventory.set_variable(name, 'centreon_hostgroups', host.get('hostgroups', []))
+            self.inventory.set_variable(name, 'centreon_templates', host.get('templates', []))
+            self.inventory.set_variable(name, 'centreon_macros', host.get('macros', {}))
+            self.inventory.set_variable(name, 'centreon_params', host.get('params', {}))
+
+            groups = [self.get_option('hostgroup_prefix') + hg for hg in host.get('hostgroups', [])]
+            groups += [self.get_option('hosttemplate_prefix') + t for t in host.get('templates', [])]
+            if host.get('poller'):
+                groups.append(self.get_option('poller_prefix') + host['poller'])
+            for group in groups:
+                group = self.inventory.add_group(self._sanitize_group_name(group))
+                self.inventory.add_child(group, name)
+
+            hostvars = self.inventory.get_host(name).get_vars()
+            self._set_composite_vars(self.get_option('compose'), hostvars, name, strict=strict)
+            self._add_host_to_composed_groups(self.get_option('groups'), hostvars, name, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option('keyed_groups'), hostvars, name, strict=strict)
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        user_cache_setting = self.get_option('cache')
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        hosts = None
+        if attempt_to_read_cache:
+            try:
+                hosts = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
+
+        if hosts is None:
+            previous = dict()
+            if user_cache_setting and self.get_option('incremental'):
+                previous = self._cache.get(cache_key) or dict()
+            try:
+                hosts = self._fetch(previous)
+            except Exception as e:
+                raise AnsibleError('Unable to build the Centreon inventory: %s' % e)
+
+        if cache_needs_update:
+            self._cache[cache_key] = hosts
+
+        self._populate(hosts)
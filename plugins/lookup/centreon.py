@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: centreon
+    short_description: Read Centreon configuration facts
+    description:
+      - Returns, for each term, the macros of a host template or a host, the templates of a host,
+        the poller of a host, the properties of a poller, or the macros and check command a service
+        template gets through its inheritance chain.
+      - Answers are memoized on local disk for C(memo_ttl) seconds and shared by all the tasks and
+        hosts of the play, so that the API is called once per distinct query and name. The memo keeps
+        at most C(memo_size) answers, the least recently used ones are dropped first.
+    requirements:
+      - Python Centreon API
+    options:
+      _terms:
+        description: Names of the objects to query.
+        required: True
+      query:
+        description: What to return for each term.
+        default: hosttemplate_macros
+        choices: ['hosttemplate_macros', 'host_macros', 'host_templates', 'host_poller', 'poller',
+                  'servicetemplate_macros', 'servicetemplate_command']
+      url:
+        description: Centreon URL
+        required: True
+        env:
+          - name: CENTREON_URL
+        vars:
+          - name: centreon_url
+      username:
+        description: Centreon API username
+        required: True
+        env:
+          - name: CENTREON_USERNAME
+        vars:
+          - name: centreon_api_user
+      password:
+        description: Centreon API username's password
+        required: True
+        env:
+          - name: CENTREON_PASSWORD
+        vars:
+          - name: centreon_api_pass
+      validate_certs:
+        description: If C(no), SSL certificates will not be validated.
+        type: bool
+        default: yes
+      token_cache:
+        description: Reuse the API authentication token cached on local disk by the modules.
+        type: bool
+        default: no
+      memo_ttl:
+        description: Seconds during which an answer is reused, C(0) always calls the API.
+        type: int
+        default: 300
+      memo_size:
+        description: Maximum number of answers kept in the memo.
+        type: int
+        default: 10000
+'''
+
+EXAMPLES = '''
+- name: Reuse the SNMP community of the host template
+  community.centreon.centreon_host:
+    url: "{{ centreon_url }}"
+    username: "{{ centreon_api_user }}"
+    password: "{{ centreon_api_pass }}"
+    name: "{{ ansible_fqdn }}"
+    macros:
+      - name: SNMPCOMMUNITY
+        value: "{{ lookup('community.centreon.centreon', 'OS-Linux-SNMP-custom').SNMPCOMMUNITY }}"
+  delegate_to: localhost
+
+- name: Poller of the host
+  debug:
+    msg: "{{ lookup('community.centreon.centreon', ansible_fqdn, query='host_poller') }}"
+'''
+
+RETURN = '''
+  _raw:
+    description:
+      - One element per term, a dict of macro names and values for C(hosttemplate_macros) and
+        C(host_macros), a list of template names for C(host_templates), a poller name (or None) for
+        C(host_poller), a dict of properties (or None) for C(poller), a dict of effective macro names and
+        values for C(servicetemplate_macros) and a C([command, arguments]) list for
+        C(servicetemplate_command). Password macros are left out.
+    type: list
+'''
+
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_client, centreon_mirror, centreon_templates
+)
+from ansible_collections.community.centreon.plugins.plugin_utils.centreon_memo import MemoCache
+
+
+def macros(webservice, obj, name):
+    return dict((m['macro name'], m['macro value'])
+                for m in centreon_mirror.clapi(webservice, 'getmacro', obj, name)
+                if str(m.get('is_password')) != '1')
+
+
+def host_pollers(webservice):
+    pollers = dict()
+    for poller in centreon_mirror.clapi(webservice, 'show', 'INSTANCE'):
+        for h in centreon_mirror.clapi(webservice, 'gethosts', 'INSTANCE', poller['name']):
+            pollers[h['name']] = poller['name']
+    return pollers
+
+
+def pollers(webservice):
+    return dict((p['name'], p) for p in centreon_mirror.clapi(webservice, 'show', 'INSTANCE'))
+
+
+class LookupModule(LookupBase):
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+        url = self.get_option('url')
+        username = self.get_option('username')
+        query = self.get_option('query')
+
+        webservice = []
+        resolver = []
+
+        def templates():
+            if not resolver:
+                resolver.append(centreon_templates.TemplateResolver(api()))
+            return resolver[0]
+
+        def api():
+            # Only log in when the memo cannot answer
+            if not webservice:
+                centreon = centreon_client.connect(url, username, self.get_option('password'),
+                                                   check_ssl=self.get_option('validate_certs'),
+                                                   token_cache=self.get_option('token_cache'))
+                webservice.append(centreon.hosts.webservice)
+            return webservice[0]
+
+        memo = MemoCache(url, username, ttl=self.get_option('memo_ttl'), max_size=self.get_option('memo_size'))
+        ret = []
+        try:
+            memo.load()
+            for term in terms:
+                if query == 'hosttemplate_macros':
+                    ret.append(memo.get(memo.key(query, term), lambda: macros(api(), 'HTPL', term)))
+                elif query == 'host_macros':
+                    ret.append(memo.get(memo.key(query, term), lambda: macros(api(), 'HOST', term)))
+                elif query == 'host_templates':
+                    ret.append(memo.get(memo.key(query, term), lambda: [
+                        t['name'] for t in centreon_mirror.clapi(api(), 'gettemplate', 'HOST', term)]))
+                elif query == 'host_poller':
+                    # One answer for all hosts, a poller lists its hosts in a single call
+                    ret.append(memo.get(memo.key('host_pollers'), lambda: host_pollers(api())).get(term))
+                elif query == 'servicetemplate_macros':
+                    ret.append(memo.get(memo.key(query, term), lambda: dict(
+                        (k, m.value) for k, m in templates().service_macros(term).items()
+                        if str(m.is_password) != '1')))
+                elif query == 'servicetemplate_command':
+                    ret.append(memo.get(memo.key(query, term), lambda: list(templates().service_command(term))))
+                elif query == 'poller':
+                    ret.append(memo.get(memo.key('pollers'), lambda: pollers(api())).get(term))
+        except Exception as e:
+            raise AnsibleError('Centreon lookup %s failed: %s' % (query, e))
+        finally:
+            memo.save()
+        self._display.vvvv('centreon lookup memo: %d hits, %d misses' % (memo.hits, memo.misses))
+        return ret
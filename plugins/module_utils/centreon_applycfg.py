@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import time
+
+from ansible.module_utils.parsing.convert_bool import boolean
+
+from ansible_collections.community.centreon.plugins.module_utils.centreon_client import (
+    DEFAULT_CACHE_DIR, cache_key, locked_file, read_json, write_json)
+
+DEFERRED = 'deferred'
+RESULT_KEY = 'deferred_applycfg'
+APPLIED_KEY = 'applied_applycfg'
+RUN_KEY = 'applycfg_run'
+
+
+def server_key(url):
+    """
+    Identifier of the Centreon server at `url` that survives the no_log masking
+    of the module results, which can hide part of the url itself.
+    """
+    return hashlib.sha256(url.rstrip('/').encode('utf-8')).hexdigest()
+
+
+def parse(value):
+    """
+    Return True, False or DEFERRED from an applycfg option value.
+    """
+    if isinstance(value, str) and value.lower() == DEFERRED:
+        return DEFERRED
+    return boolean(value, strict=True)
+
+
+def shared_applycfg(poller, url, debounce=0):
+    """
+    Apply the configuration of `poller`, coordinated with the other processes
+    doing the same on this machine through a lock file keyed by (url, poller).
+
+    A caller waits for the export in progress; if an export started after its
+    request, it reuses that outcome instead of running its own. `debounce`
+    seconds are waited before exporting so that concurrent requests join in.
+
+    Returns the API status, the API response and the timing of the run.
+    """
+    path = os.path.join(DEFAULT_CACHE_DIR, 'applycfg-%s.json' % cache_key(url, poller.name))
+    requested = time.time()
+    with locked_file(path):
+        last = read_json(path)
+        if last.get('started', 0) >= requested:
+            run = dict(last['run'], shared=True, waited=time.time() - requested)
+            return last['state'], last['response'], run
+        if debounce:
+            time.sleep(debounce)
+        started = time.time()
+        s, m = poller.applycfg()
+        finished = time.time()
+        run = dict(poller=poller.name, started=started, duration=finished - started)
+        write_json(path, dict(started=started, state=s, response=m, run=run))
+    return s, m, dict(run, shared=False, waited=started - requested)
+
+
+def applycfg(poller, mode, url, result, debounce=0):
+    """
+    Apply the configuration of `poller`, or with mode DEFERRED only record it
+    as dirty in the module `result` for the centreon_applycfg callback plugin.
+    """
+    if not mode:
+        return True, None
+    if mode == DEFERRED:
+        deferred = result.setdefault(RESULT_KEY, dict(server=server_key(url), url=url, pollers=[]))
+        if poller.name not in deferred['pollers']:
+            deferred['pollers'].append(poller.name)
+        return True, None
+    s, m, run = shared_applycfg(poller, url, debounce)
+    result.setdefault(RUN_KEY, []).append(run)
+    return s, m
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+# Options of the community.centreon.centreon doc fragment, of every Centreon module
+COMMON = dict(
+    url=dict(required=True),
+    username=dict(default='admin', no_log=True),
+    password=dict(default='centreon', no_log=True),
+    validate_certs=dict(default=True, type='bool'),
+    token_cache=dict(default=False, type='bool'),
+    token_cache_ttl=dict(default=3600, type='int'),
+    perf=dict(default=False, type='bool'),
+    profile=dict(default=None, type='path'),
+)
+
+# Options of the community.centreon.centreon.applycfg doc fragment
+APPLYCFG = dict(
+    applycfg_debounce=dict(default=0, type='float'),
+)
+
+# Options of the community.centreon.centreon.mirror doc fragment
+MIRROR = dict(
+    mirror=dict(default=None, type='path'),
+    mirror_max_age=dict(default=300, type='int'),
+)
+
+# Options of the community.centreon.centreon.object_cache doc fragment
+OBJECT_CACHE = dict(
+    object_cache=dict(default=False, type='bool'),
+)
+
+
+def argument_spec(*fragments, **options):
+    """
+    argument_spec of a Centreon module: the COMMON options, those of the
+    other `fragments` its documentation extends, then its own `options`.
+    """
+    spec = dict(COMMON)
+    for fragment in fragments:
+        spec.update(fragment)
+    spec.update(options)
+    return spec
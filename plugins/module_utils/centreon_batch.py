@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import os
+import re
+import subprocess
+import tempfile
+
+# CLAPI actions that change the configuration, queued instead of being sent
+WRITE_ACTIONS = frozenset((
+    'add', 'del', 'setparam', 'setmacro', 'delmacro', 'addtemplate', 'settemplate', 'deltemplate',
+    'applytpl', 'addhostgroup', 'sethostgroup', 'delhostgroup', 'addcontact', 'setcontact', 'delcontact',
+    'addcontactgroup', 'setcontactgroup', 'delcontactgroup', 'enable', 'disable', 'setinstance',
+    'addhost', 'sethost', 'delhost', 'addmember', 'setmember', 'delmember', 'addparent', 'setparent',
+    'delparent', 'setseverity', 'unsetseverity',
+))
+
+# Objects whose queued creation is identified by more than one value
+KEY_SIZE = {'SERVICE': 2}
+
+LINE_ERROR = re.compile(r'^Line (\d+)\s*:\s*(.*)$')
+
+
+def object_key(obj, values):
+    if values is None:
+        return None
+    if not isinstance(values, (list, tuple)):
+        values = str(values).split(';')
+    return ';'.join(str(v) for v in values[:KEY_SIZE.get(obj, 1)])
+
+
+def format_line(obj, action, values):
+    """
+    One line of a CLAPI import file: OBJECT;ACTION;value;value...
+    """
+    if values is None:
+        values = []
+    elif not isinstance(values, (list, tuple)):
+        values = [values]
+    fields = [obj, action.upper()] + ['' if v is None else str(v) for v in values]
+    for field in fields:
+        if ';' in field or '\n' in field:
+            raise ValueError('CLAPI import cannot carry %r in %s %s' % (field, obj, action))
+    return ';'.join(fields)
+
+
+def parse_line(line):
+    fields = line.split(';')
+    if len(fields) < 2 or not fields[0] or not fields[1]:
+        raise ValueError('Malformed CLAPI import line: %r' % line)
+    return fields[0], fields[1].lower(), fields[2:]
+
+
+class BatchEntry(object):
+
+    def __init__(self, obj, action, values, label):
+        self.obj = obj
+        self.action = action
+        self.values = values
+        self.label = label
+        self.line = format_line(obj, action, values)
+        self.ok = None
+        self.error = None
+
+
+class Batch(object):
+    """
+    Write operations queued as one CLAPI import file. Each entry keeps the
+    label of the object being converged when it was queued, so that the
+    results of the import can be mapped back to that object.
+    """
+
+    def __init__(self):
+        self.entries = list()
+        self.pending = set()
+        self.label = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    @contextlib.contextmanager
+    def labelled(self, label):
+        previous, self.label = self.label, label
+        try:
+            yield
+        finally:
+            self.label = previous
+
+    def record(self, obj, action, values):
+        self.entries.append(BatchEntry(obj, action, values, self.label))
+        key = object_key(obj, values)
+        if action == 'add':
+            self.pending.add((obj, key))
+        elif action == 'del':
+            self.pending.discard((obj, key))
+
+    def is_pending(self, obj, values):
+        return (obj, object_key(obj, values)) in self.pending
+
+    def text(self):
+        return '\n'.join(e.line for e in self.entries) + '\n'
+
+    def flush(self, sender):
+        """
+        Send the queued entries with `sender` and return the entries that
+        failed. `sender` takes the import text and returns {line number: error}.
+        """
+        if not self.entries:
+            return []
+        errors = sender(self.text())
+        for number, entry in enumerate(self.entries, 1):
+            entry.error = errors.get(number)
+            entry.ok = entry.error is None
+        done, self.entries, self.pending = self.entries, list(), set()
+        return [e for e in done if not e.ok]
+
+
+def failed_labels(failed):
+    """
+    label -> error messages of the failed entries.
+    """
+    labels = dict()
+    for entry in failed:
+        labels.setdefault(entry.label, list()).append('%s: %s' % (entry.line, entry.error))
+    return labels
+
+
+def labelled(batch, label):
+    if batch is None:
+        return contextlib.nullcontext()
+    return batch.labelled(label)
+
+
+def report(results, failed, label):
+    """
+    Flag the results whose object has failed entries, return True if any has.
+    """
+    for result in results:
+        errors = failed.get(label(result))
+        if errors:
+            result['failed'] = True
+            result['msg'] = result['msg'] + errors
+    return bool(failed)
+
+
+def use_batch(webservice, batch):
+    """
+    Queue the write calls of `webservice` in `batch`. Reads go to the API,
+    except for objects whose creation is still queued, which have nothing
+    to read yet.
+    """
+    call_clapi = webservice.call_clapi
+
+    def batch_call_clapi(action=None, obj=None, values=None):
+        if action in WRITE_ACTIONS:
+            batch.record(obj, action, values)
+            return True, {'result': []}
+        if batch.is_pending(obj, values):
+            return True, {'result': []}
+        return call_clapi(action, obj, values)
+
+    webservice.call_clapi = batch_call_clapi
+
+
+class ImportSender(object):
+    """
+    Send a batch with the CLAPI command line import (centreon -i), on the
+    Centreon central server the module runs on. The password is written to
+    the password prompt of the command, so it never shows in its arguments.
+    """
+
+    def __init__(self, username, password, command='centreon'):
+        self.username = username
+        self.password = password
+        self.command = command
+
+    def __call__(self, text):
+        fd, path = tempfile.mkstemp(prefix='centreon-clapi-', suffix='.txt')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+            proc = subprocess.run([self.command, '-u', self.username, '-i', path], input=self.password + '\n',
+                                  stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+        finally:
+            os.unlink(path)
+        errors = dict()
+        for out in proc.stdout.splitlines():
+            match = LINE_ERROR.match(out.strip())
+            if match:
+                errors[int(match.group(1))] = match.group(2)
+        if proc.returncode != 0 and not errors:
+            raise Exception('CLAPI import failed (%s): %s' % (proc.returncode, proc.stdout.strip()))
+        return errors
+
+
+class ParseSender(object):
+    """
+    Local stand-in for ImportSender: only parses the batch, reports the
+    malformed lines as failed and keeps the parsed lines.
+    """
+
+    def __init__(self):
+        self.lines = list()
+
+    def __call__(self, text):
+        errors = dict()
+        for number, line in enumerate(text.splitlines(), 1):
+            try:
+                obj, action, values = parse_line(line)
+            except ValueError as e:
+                errors[number] = str(e)
+                continue
+            if action not in WRITE_ACTIONS:
+                errors[number] = 'Unknown action %s' % action
+                continue
+            self.lines.append((obj, action, values))
+        return errors
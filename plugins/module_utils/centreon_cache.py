@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+import threading
+
+from ansible_collections.community.centreon.plugins.module_utils.centreon_batch import object_key
+from ansible_collections.community.centreon.plugins.module_utils.centreon_utils import macro_name
+
+# CLAPI actions whose answer is kept
+READ_ACTIONS = frozenset((
+    'show', 'getmacro', 'getparam', 'gettemplate', 'gethostgroup', 'getcontact', 'getcontactgroup',
+    'gethosts', 'getmember', 'getparent',
+))
+
+# Field naming an object in its 'show' row
+NAME_FIELDS = {
+    'SERVICE': ('host name', 'description'),
+    'STPL': ('description',),
+}
+
+# Row of a created object, from the values of its 'add'
+ADD_ROWS = {
+    'HOST': ('name', 'alias', 'address'),
+    'HTPL': ('name', 'alias', 'address'),
+    'SERVICE': ('host name', 'description'),
+    'STPL': ('description', 'alias'),
+    'CMD': ('name', 'type', 'line'),
+    'HG': ('name', 'alias'),
+}
+
+
+def as_list(values):
+    if values is None:
+        return []
+    if isinstance(values, (list, tuple)):
+        return list(values)
+    return str(values).split(';')
+
+
+def row_key(obj, row):
+    return ';'.join(str(row.get(f)) for f in NAME_FIELDS.get(obj, ('name',)))
+
+
+class ObjectCache(object):
+    """
+    Answers of the CLAPI read calls, kept up to date with the writes that
+    succeed through it: a created object appears in the cached lists, a set
+    macro or param is changed in the cached answers, and relations changed
+    by a write are read again.
+    """
+
+    def __init__(self):
+        self.answers = dict()
+        self.lock = threading.Lock()
+        self.hits = 0
+
+    @staticmethod
+    def key(action, obj, values):
+        return (action, obj, json.dumps(values, sort_keys=True, default=str))
+
+    def get(self, action, obj, values):
+        with self.lock:
+            answer = self.answers.get(self.key(action, obj, values))
+            if answer is not None:
+                self.hits += 1
+                return copy.deepcopy(answer)
+        return None
+
+    def set(self, action, obj, values, answer):
+        with self.lock:
+            self.answers[self.key(action, obj, values)] = copy.deepcopy(answer)
+
+    def _entries(self, obj, key=None, actions=None):
+        for (action, o, values), answer in self.answers.items():
+            if o != obj or (actions is not None and action not in actions):
+                continue
+            if key is not None and action != 'show' and object_key(obj, json.loads(values)) != key:
+                continue
+            yield (action, o, values), answer
+
+    def _invalidate(self, obj, key):
+        for entry, answer in list(self._entries(obj, key)):
+            if entry[0] != 'show':
+                del self.answers[entry]
+
+    def written(self, action, obj, values):
+        """
+        Bring the cached answers in line with a write that succeeded.
+        """
+        values = as_list(values)
+        size = len(NAME_FIELDS.get(obj, ('name',)))
+        key = ';'.join(str(v) for v in values[:size])
+        with self.lock:
+            if action == 'add':
+                row = dict(zip(ADD_ROWS.get(obj, ('name',)), values))
+                row.setdefault('activate', '1')
+                for (a, o, filt), answer in list(self._entries(obj, actions=('show',))):
+                    filt = json.loads(filt)
+                    if filt is None or str(filt) in key:
+                        answer.setdefault('result', []).append(row)
+            elif action == 'del':
+                for entry, answer in self._entries(obj, actions=('show',)):
+                    answer['result'] = [r for r in answer.get('result', []) if row_key(obj, r) != key]
+                self._invalidate(obj, key)
+            elif action in ('setparam', 'enable', 'disable'):
+                if action == 'setparam':
+                    param, value = values[size], values[size + 1] if len(values) > size + 1 else ''
+                else:
+                    param, value = 'activate', '1' if action == 'enable' else '0'
+                for entry, answer in self._entries(obj, actions=('show',)):
+                    for r in answer.get('result', []):
+                        if row_key(obj, r) == key and param in r:
+                            r[param] = value
+                for entry, answer in self._entries(obj, key, actions=('getparam',)):
+                    answer['result'] = [p for p in answer.get('result', [])
+                                        if str(p).partition(':')[0].strip() != param]
+                    answer['result'].append('%s: %s' % (param, value))
+            elif action == 'setmacro':
+                name, value = macro_name(values[size]), values[size + 1]
+                macro = {'macro name': name, 'macro value': value,
+                         'is_password': values[size + 2] if len(values) > size + 2 else 0,
+                         'description': values[size + 3] if len(values) > size + 3 else ''}
+                for entry, answer in self._entries(obj, key, actions=('getmacro',)):
+                    answer['result'] = [m for m in answer.get('result', [])
+                                        if macro_name(m.get('macro name')) != name] + [macro]
+            elif action == 'delmacro':
+                name = macro_name(values[size])
+                for entry, answer in self._entries(obj, key, actions=('getmacro',)):
+                    answer['result'] = [m for m in answer.get('result', [])
+                                        if macro_name(m.get('macro name')) != name]
+            else:
+                # Relations, templates and anything else: read them again
+                self._invalidate(obj, key)
+                if action == 'applytpl':
+                    for entry, answer in list(self._entries('SERVICE', actions=('show',))):
+                        del self.answers[entry]
+
+
+def use_object_cache(webservice, cache):
+    """
+    Serve the CLAPI reads of `webservice` from `cache` and write its
+    successful writes through to it.
+    """
+    call_clapi = webservice.call_clapi
+
+    def cached_call_clapi(action=None, obj=None, values=None):
+        if action in READ_ACTIONS:
+            answer = cache.get(action, obj, values)
+            if answer is not None:
+                return True, answer
+            s, res = call_clapi(action, obj, values)
+            if s and isinstance(res, dict):
+                cache.set(action, obj, values, res)
+            return s, res
+        s, res = call_clapi(action, obj, values)
+        if s:
+            cache.written(action, obj, values)
+        return s, res
+
+    webservice.call_clapi = cached_call_clapi
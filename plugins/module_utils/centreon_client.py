@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+
+from ansible.module_utils.connection import Connection
+
+from ansible_collections.community.centreon.plugins.module_utils.centreon_cache import ObjectCache, use_object_cache
+from ansible_collections.community.centreon.plugins.module_utils.centreon_perf import use_tracer
+
+try:
+    from centreonapi.centreon import Centreon
+    from centreonapi.webservice import Webservice
+except ImportError:
+    pass
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.ansible', 'tmp', 'centreon')
+DEFAULT_TOKEN_TTL = 3600
+
+
+def cache_key(url, username):
+    return hashlib.sha256(f"{url.rstrip('/')}|{username}".encode('utf-8')).hexdigest()
+
+
+@contextlib.contextmanager
+def locked_file(path, exclusive=True):
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def write_json(path, content):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(content, f)
+    os.rename(tmp, path)
+
+
+class TokenCache(object):
+    """
+    Authentication tokens stored on local disk, keyed by (url, username).
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TOKEN_TTL):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, 'tokens.json')
+        self.ttl = ttl
+
+    def get(self, url, username):
+        with locked_file(self.path, exclusive=False):
+            entry = read_json(self.path).get(cache_key(url, username))
+        if entry is None or entry.get('expires', 0) < time.time():
+            return None
+        return entry.get('token')
+
+    def set(self, url, username, token):
+        with locked_file(self.path):
+            tokens = read_json(self.path)
+            now = time.time()
+            tokens = {k: v for k, v in tokens.items() if v.get('expires', 0) >= now}
+            tokens[cache_key(url, username)] = {'token': token, 'expires': now + self.ttl}
+            write_json(self.path, tokens)
+
+    def invalidate(self, url, username):
+        with locked_file(self.path):
+            tokens = read_json(self.path)
+            if tokens.pop(cache_key(url, username), None) is not None:
+                write_json(self.path, tokens)
+
+
+def is_unauthorized(response):
+    if isinstance(response, str):
+        try:
+            response = json.loads(response)
+        except ValueError:
+            return False
+    if not isinstance(response, list):
+        return False
+    return any(isinstance(r, dict) and str(r.get('code')) == '401' for r in response)
+
+
+def use_token_cache(webservice, cache, url, username):
+    call_clapi = webservice.call_clapi
+
+    def login():
+        webservice.auth()
+        cache.set(url, username, webservice.auth_token)
+
+    def cached_call_clapi(action=None, obj=None, values=None):
+        if webservice.auth_token is None:
+            login()
+        token = webservice.auth_token
+        s, res = call_clapi(action, obj, values)
+        if not s and is_unauthorized(res):
+            # Token expired server-side: refresh it once and replay the call,
+            # unless a concurrent call already did
+            if webservice.auth_token == token:
+                cache.invalidate(url, username)
+                webservice.auth_token = None
+            login()
+            s, res = call_clapi(action, obj, values)
+        return s, res
+
+    webservice.auth_token = cache.get(url, username) or webservice.auth_token
+    webservice.call_clapi = cached_call_clapi
+
+
+def use_single_login(webservice):
+    """
+    Serialize the logins of `webservice`: calls started concurrently while
+    no token is set log in once, the others wait for its token.
+    """
+    auth = webservice.auth
+    lock = threading.Lock()
+
+    def single_auth():
+        with lock:
+            if webservice.auth_token is None:
+                auth()
+
+    webservice.auth = single_auth
+
+
+def use_connection(webservice, socket_path):
+    connection = Connection(socket_path)
+
+    def connection_call_clapi(action=None, obj=None, values=None):
+        s, res = connection.call_clapi(action, obj, values)
+        return s, res
+
+    # Authentication is handled by the connection plugin
+    webservice.auth_token = 'persistent-connection'
+    webservice.call_clapi = connection_call_clapi
+
+
+# Set by the controller-side action plugins, which run the loop items of a task
+# in one worker process: clients, tokens and caches only last for that task
+REUSE_CLIENTS = False
+_clients = dict()
+_tokens = dict()
+_object_caches = dict()
+
+
+def connect(url, username, password, check_ssl=True, token_cache=False, token_cache_ttl=DEFAULT_TOKEN_TTL,
+            socket_path=None, object_cache=False, tracer=None):
+    key = (url, username)
+    centreon = _clients.get(key) if REUSE_CLIENTS else None
+    if centreon is None:
+        centreon = Centreon(url, username, password, check_ssl=check_ssl)
+    webservice = Webservice.getInstance()
+    if (webservice.url, webservice.authuser) != key:
+        # Webservice is a process-wide singleton loaded by the first Centreon(),
+        # keep the token of the previous (url, username) to switch back to it
+        _tokens[(webservice.url, webservice.authuser)] = webservice.auth_token
+        webservice.load(url, username, password, check_ssl)
+        webservice.auth_token = _tokens.get(key) if REUSE_CLIENTS else None
+    webservice.check_ssl = check_ssl
+    # Drop any wrapper installed by a previous connect() in this process
+    webservice.__dict__.pop('call_clapi', None)
+    webservice.__dict__.pop('auth', None)
+    if socket_path:
+        use_connection(webservice, socket_path)
+    elif token_cache:
+        use_token_cache(webservice, TokenCache(ttl=token_cache_ttl), url, username)
+    if tracer is not None:
+        use_tracer(webservice, tracer)
+    # Outside the tracer, a login skipped because another call did it is not counted
+    use_single_login(webservice)
+    if object_cache:
+        # Shared by the tasks of a controller process, like the clients
+        cache = _object_caches.get(key) if REUSE_CLIENTS else None
+        if cache is None:
+            cache = _object_caches[key] = ObjectCache()
+        use_object_cache(webservice, cache)
+    if REUSE_CLIENTS:
+        _clients[key] = centreon
+    return centreon
+
+
+def invalidate_token(url, username):
+    TokenCache().invalidate(url, username)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+from ansible_collections.community.centreon.plugins.module_utils.centreon_fingerprint import digest
+
+# Kinds of objects, in the order they must be created. Deletions go the other way.
+KINDS = ('commands', 'servicetemplates', 'hostgroups', 'hosts', 'services')
+
+# option -> attribute of the listed object, compared without any further API call
+FIELDS = {
+    'commands': (('type', 'type'), ('line', 'line')),
+    'servicetemplates': (('status', 'activate'),),
+    'hostgroups': (),
+    'hosts': (('alias', 'alias'), ('ipaddr', 'address'), ('status', 'activate')),
+    'services': (('status', 'activate'),),
+}
+
+# Options that can only be compared by reading the object again
+DEEP = {
+    'commands': (),
+    'servicetemplates': ('contacts', 'contactgroups', 'macros', 'params'),
+    'hostgroups': (),
+    'hosts': ('hostgroups', 'hosttemplates', 'contacts', 'contactgroups', 'macros', 'params'),
+    'services': ('contacts', 'contactgroups', 'macros', 'params'),
+}
+
+DEFAULTS = {
+    'commands': dict(type='check'),
+    'servicetemplates': dict(status='enabled'),
+    'hosts': dict(status='enabled'),
+    'services': dict(status='enabled'),
+}
+
+
+def spec_key(kind, spec):
+    if kind == 'services':
+        return (spec.get('host'), spec.get('name'))
+    return spec.get('name')
+
+
+def _normalize(option, value):
+    if option == 'status':
+        return '1' if value == 'enabled' else '0'
+    return str(value)
+
+
+def _options(kind, spec):
+    spec = dict(DEFAULTS.get(kind, {}), **dict((k, v) for k, v in spec.items() if v is not None))
+    return [(option, attr, spec[option]) for option, attr in FIELDS[kind] if option in spec]
+
+
+def desired_digest(kind, spec):
+    return digest([(attr, _normalize(option, value)) for option, attr, value in _options(kind, spec)])
+
+
+def actual_digest(kind, spec, obj):
+    return digest([(attr, str(getattr(obj, attr, None))) for option, attr, value in _options(kind, spec)])
+
+
+class Plan(object):
+    """
+    Keys of the objects of one kind to create, update, delete, or leave alone.
+    """
+
+    def __init__(self, create, update, delete, unchanged):
+        self.create = create
+        self.update = update
+        self.delete = delete
+        self.unchanged = unchanged
+
+    def todo(self):
+        return self.create | self.update | self.delete
+
+    def counts(self):
+        return dict(create=len(self.create), update=len(self.update), delete=len(self.delete),
+                    unchanged=len(self.unchanged))
+
+
+def plan(kind, specs, existing):
+    """
+    Compare `specs` with `existing` (key -> listed object) through set
+    differences of keys and of (key, digest) pairs, so that only the objects
+    that are missing, superfluous or differ are touched.
+    """
+    wanted = dict((spec_key(kind, s), s) for s in specs)
+    present = set(k for k, s in wanted.items() if s.get('state', 'present') == 'present')
+    absent = set(wanted) - present
+    known = set(existing)
+
+    common = present & known
+    desired = set((k, desired_digest(kind, wanted[k])) for k in common)
+    actual = set((k, actual_digest(kind, wanted[k], existing[k])) for k in common)
+    update = set(k for k, d in desired - actual)
+    update |= set(k for k in common if any(wanted[k].get(option) for option in DEEP[kind]))
+
+    return Plan(present - known, update, absent & known, common - update)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import time
+
+from ansible_collections.community.centreon.plugins.module_utils import centreon_client
+
+# Module options that do not describe the desired state of the object
+NOT_SPEC = frozenset((
+    'username', 'password', 'validate_certs', 'token_cache', 'token_cache_ttl', 'applycfg',
+    'applycfg_debounce', 'reconcile_workers', 'mirror', 'mirror_max_age', 'fingerprint',
+    'fingerprint_max_age', 'perf', 'profile', 'object_cache',
+))
+
+
+def digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def spec_hash(params):
+    return digest(dict((k, v) for k, v in params.items() if k not in NOT_SPEC))
+
+
+def row_marker(webservice, obj, values, match):
+    """
+    Hash of the 'show' row of one object, the cheapest server-side view of
+    its state. CLAPI filters 'show' with a LIKE, `match` picks the exact row.
+    """
+    s, res = webservice.call_clapi('show', obj, values)
+    if not s:
+        raise Exception('CLAPI %s show failed: %s' % (obj, res))
+    rows = [r for r in res.get('result', []) if match(r)]
+    return digest(rows[0]) if rows else None
+
+
+def host_marker(webservice, name):
+    return row_marker(webservice, 'HOST', name, lambda r: r.get('name') == name)
+
+
+def service_marker(webservice, host, name):
+    return row_marker(webservice, 'SERVICE', host,
+                      lambda r: r.get('host name') == host and r.get('description') == name)
+
+
+class FingerprintFile(object):
+    """
+    Last known state of the objects converged by the modules: hash of the
+    desired spec and server-side marker, keyed by URL and object.
+    """
+
+    def __init__(self, path, max_age=None):
+        self.path = path
+        self.max_age = max_age
+
+    def _key(self, url, obj):
+        return '%s|%s' % (url.rstrip('/'), obj)
+
+    def unchanged(self, url, obj, spec, marker):
+        with centreon_client.locked_file(self.path, exclusive=False):
+            entry = centreon_client.read_json(self.path).get(self._key(url, obj))
+        if entry is None:
+            return False
+        if self.max_age is not None and entry.get('at', 0) + self.max_age < time.time():
+            return False
+        return entry.get('spec') == spec and entry.get('marker') == marker
+
+    def record(self, url, obj, spec, marker):
+        with centreon_client.locked_file(self.path):
+            entries = centreon_client.read_json(self.path)
+            entries[self._key(url, obj)] = dict(spec=spec, marker=marker, at=time.time())
+            centreon_client.write_json(self.path, entries)
+
+    def forget(self, url, obj):
+        with centreon_client.locked_file(self.path):
+            entries = centreon_client.read_json(self.path)
+            if entries.pop(self._key(url, obj), None) is not None:
+                centreon_client.write_json(self.path, entries)
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+try:
+    from centreonapi.webservice.configuration.host import Host
+    from centreonapi.webservice.configuration.poller import Poller
+    from centreonapi.webservice.configuration.service import Service
+except ImportError:
+    pass
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS pollers (name TEXT PRIMARY KEY, properties TEXT);
+CREATE TABLE IF NOT EXISTS hosts (name TEXT PRIMARY KEY, poller TEXT, properties TEXT);
+CREATE TABLE IF NOT EXISTS host_templates (host TEXT, template TEXT, PRIMARY KEY (host, template));
+CREATE TABLE IF NOT EXISTS host_hostgroups (host TEXT, hostgroup TEXT, PRIMARY KEY (host, hostgroup));
+CREATE TABLE IF NOT EXISTS hosttemplates (name TEXT PRIMARY KEY, properties TEXT);
+CREATE TABLE IF NOT EXISTS hostgroups (name TEXT PRIMARY KEY, properties TEXT);
+CREATE TABLE IF NOT EXISTS services (host TEXT, name TEXT, properties TEXT, PRIMARY KEY (host, name));
+CREATE TABLE IF NOT EXISTS servicetemplates (name TEXT PRIMARY KEY, properties TEXT);
+CREATE TABLE IF NOT EXISTS commands (name TEXT PRIMARY KEY, properties TEXT);
+CREATE INDEX IF NOT EXISTS hosts_poller ON hosts (poller);
+CREATE INDEX IF NOT EXISTS host_templates_template ON host_templates (template);
+CREATE INDEX IF NOT EXISTS host_hostgroups_hostgroup ON host_hostgroups (hostgroup);
+CREATE INDEX IF NOT EXISTS services_name ON services (name);
+'''
+
+# table -> CLAPI object listed with a single 'show'
+SHOW_OBJECTS = (
+    ('pollers', 'INSTANCE'),
+    ('hosttemplates', 'HTPL'),
+    ('hostgroups', 'HG'),
+    ('servicetemplates', 'STPL'),
+    ('commands', 'CMD'),
+)
+
+
+class MirrorStale(Exception):
+    pass
+
+
+def clapi(webservice, action, obj, values=None):
+    s, res = webservice.call_clapi(action, obj, values)
+    if not s:
+        raise Exception('CLAPI %s %s failed: %s' % (obj, action, res))
+    return res.get('result', [])
+
+
+class CentreonMirror(object):
+    """
+    Local SQLite mirror of the Centreon configuration, written by the
+    centreon_sync_cache module and read by the other modules.
+    """
+
+    def __init__(self, path, max_age=None):
+        self.path = path
+        self.max_age = max_age
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o700)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    #### Freshness
+    def synced_at(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'synced_at'").fetchone()
+        return float(row[0]) if row else None
+
+    def synced_url(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'url'").fetchone()
+        return row[0] if row else None
+
+    def check_fresh(self, url=None):
+        synced_at = self.synced_at()
+        if synced_at is None:
+            raise MirrorStale('%s was never synchronized' % self.path)
+        synced_url = self.synced_url()
+        if url is not None and (synced_url or '').rstrip('/') != url.rstrip('/'):
+            raise MirrorStale('%s mirrors %s, not %s' % (self.path, synced_url, url))
+        age = time.time() - synced_at
+        if self.max_age is not None and age > self.max_age:
+            raise MirrorStale('%s is %d seconds old, more than %d' % (self.path, age, self.max_age))
+        return self
+
+    #### Synchronization
+    def sync(self, webservice, host_relations=False):
+        """
+        Rebuild the whole mirror from the API in one transaction. The templates
+        of the hosts, with `host_relations`, cost one more call per host.
+        """
+        started = time.time()
+        rows = dict()
+        for table, obj in SHOW_OBJECTS:
+            rows[table] = clapi(webservice, 'show', obj)
+        hosts = clapi(webservice, 'show', 'HOST')
+        services = clapi(webservice, 'show', 'SERVICE')
+
+        host_poller = dict()
+        for poller in rows['pollers']:
+            for h in clapi(webservice, 'gethosts', 'INSTANCE', poller.get('name')):
+                host_poller[h.get('name')] = poller.get('name')
+        memberships = list()
+        for hg in rows['hostgroups']:
+            for h in clapi(webservice, 'getmember', 'HG', hg.get('name')):
+                memberships.append((h.get('name'), hg.get('name')))
+        templates = list()
+        if host_relations:
+            for h in hosts:
+                for t in clapi(webservice, 'gettemplate', 'HOST', h.get('name')):
+                    templates.append((h.get('name'), t.get('name')))
+
+        with self.db:
+            for table in ('pollers', 'hosts', 'host_templates', 'host_hostgroups', 'hosttemplates',
+                          'hostgroups', 'services', 'servicetemplates', 'commands'):
+                self.db.execute('DELETE FROM %s' % table)
+            for table, obj in SHOW_OBJECTS:
+                # service templates are named by their description
+                self.db.executemany(
+                    'INSERT OR REPLACE INTO %s (name, properties) VALUES (?, ?)' % table,
+                    [(p.get('name') or p.get('description'), json.dumps(p)) for p in rows[table]])
+            self.db.executemany('INSERT OR REPLACE INTO hosts (name, poller, properties) VALUES (?, ?, ?)',
+                                [(h.get('name'), host_poller.get(h.get('name')), json.dumps(h)) for h in hosts])
+            self.db.executemany('INSERT OR REPLACE INTO services (host, name, properties) VALUES (?, ?, ?)',
+                                [(s.get('host name'), s.get('description'), json.dumps(s)) for s in services])
+            self.db.executemany('INSERT OR IGNORE INTO host_hostgroups (host, hostgroup) VALUES (?, ?)', memberships)
+            self.db.executemany('INSERT OR IGNORE INTO host_templates (host, template) VALUES (?, ?)', templates)
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('synced_at', ?)", (str(started),))
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('url', ?)", (webservice.url,))
+
+        return dict((table, self.count(table)) for table in
+                    ('pollers', 'hosts', 'hosttemplates', 'hostgroups', 'services', 'servicetemplates', 'commands'))
+
+    def count(self, table):
+        return self.db.execute('SELECT COUNT(*) FROM %s' % table).fetchone()[0]
+
+    #### Queries
+    def _properties(self, query, args):
+        row = self.db.execute(query, args).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def host(self, name):
+        return self._properties('SELECT properties FROM hosts WHERE name = ?', (name,))
+
+    def service(self, host, name):
+        return self._properties('SELECT properties FROM services WHERE host = ? AND name = ?', (host, name))
+
+    def poller(self, name):
+        return self._properties('SELECT properties FROM pollers WHERE name = ?', (name,))
+
+    def hostgroups(self):
+        return dict((name, json.loads(p)) for name, p in self.db.execute('SELECT name, properties FROM hostgroups'))
+
+    def host_templates(self, host):
+        return [r[0] for r in self.db.execute('SELECT template FROM host_templates WHERE host = ?', (host,))]
+
+    def host_hostgroups(self, host):
+        return [r[0] for r in self.db.execute('SELECT hostgroup FROM host_hostgroups WHERE host = ?', (host,))]
+
+    def hosts_with_template(self, template):
+        return [r[0] for r in self.db.execute('SELECT host FROM host_templates WHERE template = ?', (template,))]
+
+    def hosts_in_hostgroup(self, hostgroup):
+        return [r[0] for r in self.db.execute('SELECT host FROM host_hostgroups WHERE hostgroup = ?', (hostgroup,))]
+
+    def hosts_on_poller(self, poller):
+        return [r[0] for r in self.db.execute('SELECT name FROM hosts WHERE poller = ?', (poller,))]
+
+    #### Same contract as the centreonapi get() methods
+    def get_poller(self, name):
+        properties = self.poller(name)
+        return (True, Poller(properties)) if properties else (False, None)
+
+    def get_host(self, name):
+        properties = self.host(name)
+        return (True, Host(properties)) if properties else (False, None)
+
+    def get_service(self, host, name):
+        properties = self.service(host, name)
+        return (True, Service(properties)) if properties else (False, None)
+
+    #### Write-through, so that the mirror follows the changes made by the modules
+    def record_host(self, host, poller=None, **changes):
+        properties = dict(id=host.id, name=host.name, alias=host.alias, address=host.address,
+                          activate=host.activate)
+        properties.update((k, v) for k, v in changes.items() if v is not None)
+        self.set_host(properties, poller)
+
+    def record_service(self, host, name, service=None):
+        self.set_service({'host name': host, 'description': name,
+                          'id': getattr(service, 'id', None), 'activate': getattr(service, 'activate', '1')})
+
+    def set_host(self, properties, poller=None):
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO hosts (name, poller, properties) VALUES (?, ?, ?)',
+                            (properties.get('name'), poller, json.dumps(properties)))
+
+    def record_host_relations(self, host, templates=None, hostgroups=None):
+        """
+        Follow the template and hostgroup items (name, state) set on `host`.
+        """
+        with self.db:
+            for table, column, items in (('host_templates', 'template', templates),
+                                         ('host_hostgroups', 'hostgroup', hostgroups)):
+                for item in items or []:
+                    if item.get('state', "present") == "present":
+                        query = 'INSERT OR IGNORE INTO %s (host, %s) VALUES (?, ?)'
+                    else:
+                        query = 'DELETE FROM %s WHERE host = ? AND %s = ?'
+                    self.db.execute(query % (table, column), (host, item.get('name')))
+
+    def rows_digest(self):
+        """
+        Hash of the mirrored rows, to tell whether a synchronization changed them.
+        """
+        digest = hashlib.sha256()
+        for table in ('pollers', 'hosts', 'host_templates', 'host_hostgroups', 'hosttemplates',
+                      'hostgroups', 'services', 'servicetemplates', 'commands'):
+            for row in self.db.execute('SELECT * FROM %s ORDER BY 1, 2' % table):
+                digest.update(json.dumps([table] + list(row)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def delete_host(self, name):
+        with self.db:
+            for query in ('DELETE FROM hosts WHERE name = ?', 'DELETE FROM services WHERE host = ?',
+                          'DELETE FROM host_templates WHERE host = ?', 'DELETE FROM host_hostgroups WHERE host = ?'):
+                self.db.execute(query, (name,))
+
+    def set_service(self, properties):
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO services (host, name, properties) VALUES (?, ?, ?)',
+                            (properties.get('host name'), properties.get('description'), json.dumps(properties)))
+
+    def delete_service(self, host, name):
+        with self.db:
+            self.db.execute('DELETE FROM services WHERE host = ? AND name = ?', (host, name))
+
+    def set_hostgroup(self, properties):
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO hostgroups (name, properties) VALUES (?, ?)',
+                            (properties.get('name'), json.dumps(properties)))
+
+    def delete_hostgroup(self, name):
+        with self.db:
+            self.db.execute('DELETE FROM hostgroups WHERE name = ?', (name,))
+            self.db.execute('DELETE FROM host_hostgroups WHERE hostgroup = ?', (name,))
+
+
+def open_mirror(path, max_age, url=None):
+    """
+    Return the mirror at `path` if it is fresh enough and was synchronized
+    from `url`, None to read live.
+    """
+    if not path:
+        return None
+    mirror = None
+    try:
+        mirror = CentreonMirror(path, max_age)
+        return mirror.check_fresh(url)
+    except (MirrorStale, sqlite3.Error):
+        if mirror is not None:
+            mirror.close()
+        return None
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import json
+import threading
+import time
+
+from ansible_collections.community.centreon.plugins.module_utils.centreon_cache import READ_ACTIONS
+
+POLLER_ACTIONS = frozenset(('applycfg', 'pollergenerate', 'pollertest', 'cfgmove', 'pollerreload', 'pollerrestart'))
+
+PHASES = ('login', 'poller', 'read', 'write', 'applycfg')
+
+# Upper bounds in seconds of the call latency histogram buckets, a last bucket takes the slower calls
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def phase_of(action, obj):
+    action = str(action).lower()
+    if action in POLLER_ACTIONS:
+        return 'applycfg'
+    if obj == 'INSTANCE':
+        return 'poller'
+    if action in READ_ACTIONS:
+        return 'read'
+    return 'write'
+
+
+def body_size(content):
+    if content is None:
+        return 0
+    if not isinstance(content, str):
+        content = json.dumps(content)
+    return len(content.encode('utf-8'))
+
+
+class Tracer(object):
+    """
+    API calls made by a task: count per action, seconds per phase and size
+    of the JSON bodies sent and received.
+    """
+
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.seconds = dict((phase, 0.0) for phase in PHASES)
+        # action -> [calls per bucket, the last one for calls above BUCKETS[-1]], seconds
+        self.latency = dict()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def record(self, phase, seconds, action=None, sent=0, received=0):
+        with self.lock:
+            if action is not None:
+                self.calls[action] += 1
+                buckets, total = self.latency.get(action) or ([0] * (len(BUCKETS) + 1), 0.0)
+                buckets[next((i for i, le in enumerate(BUCKETS) if seconds <= le), len(BUCKETS))] += 1
+                self.latency[action] = (buckets, total + seconds)
+            self.seconds[phase] += seconds
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def result(self):
+        with self.lock:
+            api = sum(self.seconds.values())
+            return dict(calls=dict(self.calls), total_calls=sum(self.calls.values()),
+                        api_seconds=round(api, 6), task_seconds=round(time.time() - self.started, 6),
+                        phases=dict((phase, round(s, 6)) for phase, s in self.seconds.items()),
+                        bytes_sent=self.bytes_sent, bytes_received=self.bytes_received,
+                        latency=dict((action, dict(buckets=list(buckets), seconds=round(total, 6)))
+                                     for action, (buckets, total) in self.latency.items()))
+
+
+def use_tracer(webservice, tracer):
+    """
+    Record the logins and CLAPI calls of `webservice` in `tracer`.
+    """
+    call_clapi = webservice.call_clapi
+    auth = webservice.auth
+    # Login time spent inside a call, per thread, not counted twice
+    local = threading.local()
+
+    def traced_auth():
+        start = time.time()
+        try:
+            return auth()
+        finally:
+            seconds = time.time() - start
+            local.login = getattr(local, 'login', 0.0) + seconds
+            tracer.record('login', seconds, 'authenticate')
+
+    def traced_call_clapi(action=None, obj=None, values=None):
+        local.login = 0.0
+        start = time.time()
+        s, res = call_clapi(action, obj, values)
+        tracer.record(phase_of(action, obj), time.time() - start - local.login, str(action).lower(),
+                      body_size(dict(action=action, object=obj, values=values)), body_size(res))
+        return s, res
+
+    webservice.auth = traced_auth
+    webservice.call_clapi = traced_call_clapi
+
+
+def attach(module):
+    """
+    Return a Tracer when the `perf` option of `module` is set, and add its
+    result as `perf` to what the module returns, success or failure.
+    """
+    if not module.params.get('perf'):
+        return None
+    tracer = Tracer()
+    exit_json, fail_json = module.exit_json, module.fail_json
+
+    def traced_exit_json(**kwargs):
+        kwargs['perf'] = tracer.result()
+        exit_json(**kwargs)
+
+    def traced_fail_json(msg, **kwargs):
+        kwargs['perf'] = tracer.result()
+        fail_json(msg=msg, **kwargs)
+
+    module.exit_json = traced_exit_json
+    module.fail_json = traced_fail_json
+    return tracer
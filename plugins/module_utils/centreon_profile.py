@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import re
+import time
+import tracemalloc
+
+from ansible.module_utils import basic
+
+ENV = 'CENTREON_PROFILE_DIR'
+TOP = 25
+
+
+def profile_dir():
+    """
+    Directory to write the profile of this run to, from the environment or
+    the profile option of the module, or None.
+    """
+    directory = os.environ.get(ENV)
+    if not directory:
+        directory = basic._load_params().get('profile')
+    return os.path.expanduser(directory) if directory else None
+
+
+def object_name(params):
+    if params.get('host') and params.get('name'):
+        return '%s-%s' % (params['host'], params['name'])
+    if params.get('name'):
+        return str(params['name'])
+    if params.get('hg'):
+        hg = params['hg'] if isinstance(params['hg'], list) else [params['hg']]
+        return '+'.join(str(h.get('name') if isinstance(h, dict) else h) for h in hg)
+    if params.get('instance'):
+        return str(params['instance'])
+    return 'all'
+
+
+def report_path(directory, module, params):
+    name = re.sub(r'[^A-Za-z0-9_.+-]+', '_', object_name(params))[:100]
+    now = time.time()
+    stamp = '%s.%03d' % (time.strftime('%Y%m%dT%H%M%S', time.localtime(now)), int(now * 1000) % 1000)
+    return os.path.join(directory, '%s-%s-%s-%d' % (module, name, stamp, os.getpid()))
+
+
+def write_report(path, profiler, snapshot, seconds, peak):
+    if profiler is not None:
+        profiler.dump_stats(path + '.pstats')
+    out = io.StringIO()
+    out.write('Wall time: %.3f s\nPeak traced memory: %.1f KiB\n\n' % (seconds, peak / 1024.0))
+    out.write('Top %d allocation sites\n' % TOP)
+    for stat in snapshot.statistics('lineno')[:TOP]:
+        out.write('%s\n' % stat)
+    if profiler is not None:
+        out.write('\n')
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(TOP)
+    with open(path + '.txt', 'w') as f:
+        f.write(out.getvalue())
+
+
+def profiled(module):
+    """
+    Decorate the main() of `module`: when a profile directory is set, run it
+    under cProfile and tracemalloc and write there the pstats dump
+    (<module>-<object>-<time>-<pid>.pstats) and a summary with the top
+    allocation sites (same name, .txt).
+    """
+    def decorator(main):
+        @functools.wraps(main)
+        def wrapper():
+            directory = profile_dir()
+            if not directory:
+                return main()
+            path = report_path(directory, module, basic._load_params())
+            profiler = cProfile.Profile()
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            start = time.time()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is active in this process
+                profiler = None
+            try:
+                return main()
+            finally:
+                seconds = time.time() - start
+                if profiler is not None:
+                    profiler.disable()
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                if not tracing:
+                    tracemalloc.stop()
+                try:
+                    os.makedirs(directory, exist_ok=True)
+                    write_report(path, profiler, snapshot, seconds, peak)
+                except (IOError, OSError):
+                    pass
+        return wrapper
+    return decorator
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+
+# Read call of a host issued for each option of centreon_host
+HOST_GETTERS = (
+    ('hostgroups', 'gethostgroup'),
+    ('hosttemplates', 'gettemplate'),
+    ('contacts', 'getcontact'),
+    ('contactgroups', 'getcontactgroup'),
+    ('macros', 'getmacro'),
+    ('params', 'getparams'),
+)
+
+
+def concurrently(*calls, max_workers=None):
+    """
+    Run independent API calls at the same time, return their results in order.
+    """
+    if len(calls) < 2:
+        return [call() for call in calls]
+    with ThreadPoolExecutor(max_workers=max_workers or len(calls)) as pool:
+        futures = [pool.submit(call) for call in calls]
+        return [f.result() for f in futures]
+
+
+class Snapshot(object):
+    """
+    Wrap a centreonapi object and prefetch the result of its `getters`
+    concurrently. The first call to each getter is served from the snapshot,
+    any later call (after a write) goes to the API again.
+    """
+
+    def __init__(self, obj, getters, max_workers=None):
+        results = concurrently(*[getattr(obj, g) for g in getters], max_workers=max_workers)
+        object.__setattr__(self, '_obj', obj)
+        object.__setattr__(self, '_results', dict(zip(getters, results)))
+
+    def __getattr__(self, name):
+        if name in self._results:
+            result = self._results.pop(name)
+            return lambda: result
+        return getattr(self._obj, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._obj, name, value)
+
+    def __str__(self):
+        return str(self._obj)
+
+    @property
+    def __class__(self):
+        # Let isinstance() and the centreonapi helpers see the wrapped object type
+        return self._obj.__class__
+
+
+def host_snapshot(host, spec):
+    """
+    Snapshot of the host state needed to converge `spec` (centreon_host options).
+    """
+    getters = [getter for option, getter in HOST_GETTERS if spec.get(option)]
+    if not getters:
+        return host
+    return Snapshot(host, getters)
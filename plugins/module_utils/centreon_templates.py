@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+from collections import namedtuple
+
+from ansible_collections.community.centreon.plugins.module_utils.centreon_snapshot import concurrently
+from ansible_collections.community.centreon.plugins.module_utils.centreon_utils import macro_name
+
+Macro = namedtuple('Macro', ('value', 'is_password', 'description'))
+
+
+def clapi(webservice, action, obj, values=None):
+    s, res = webservice.call_clapi(action, obj, values)
+    if not s:
+        raise Exception('CLAPI %s %s failed: %s' % (obj, action, res))
+    return res.get('result', [])
+
+
+def macros_of(rows):
+    return dict((macro_name(m.get('macro name')),
+                 Macro(m.get('macro value'), m.get('is_password') or 0, m.get('description') or ''))
+                for m in rows)
+
+
+class TemplateResolver(object):
+    """
+    Inheritance graph of the service templates and host templates.
+
+    The templates are listed once. The own attributes of a template (parents,
+    macros, check command) are read the first time a chain goes through it,
+    and every effective attribute is memoized, so each template costs its
+    reads at most once whatever the number of services resolved.
+    """
+
+    def __init__(self, webservice):
+        self.webservice = webservice
+        self.servicetemplates, self.hosttemplates = concurrently(
+            lambda: dict((t.get('description'), t) for t in clapi(webservice, 'show', 'STPL')),
+            lambda: dict((t.get('name'), t) for t in clapi(webservice, 'show', 'HTPL')))
+        self._own = dict()
+        self._effective = dict()
+
+    def _memo(self, store, key, compute):
+        if key not in store:
+            store[key] = compute()
+        return store[key]
+
+    #### Own attributes
+    def _own_servicetemplate(self, name):
+        def load():
+            params = dict()
+            for p in clapi(self.webservice, 'getparam', 'STPL',
+                           [name, 'template|check_command|check_command_arguments']):
+                key, _, value = str(p).partition(':')
+                params[key.strip()] = value.strip()
+            return dict(parents=[params['template']] if params.get('template') else [],
+                        command=params.get('check_command') or None,
+                        arguments=params.get('check_command_arguments') or None,
+                        macros=macros_of(clapi(self.webservice, 'getmacro', 'STPL', name)))
+        return self._memo(self._own, ('STPL', name), load)
+
+    def _own_hosttemplate(self, name):
+        def load():
+            return dict(parents=[t.get('name') for t in clapi(self.webservice, 'gettemplate', 'HTPL', name)],
+                        macros=macros_of(clapi(self.webservice, 'getmacro', 'HTPL', name)))
+        return self._memo(self._own, ('HTPL', name), load)
+
+    #### Chains
+    def service_chain(self, name):
+        """
+        Service templates from `name` up to the root of its inheritance.
+        """
+        chain = list()
+        while name and name in self.servicetemplates and name not in chain:
+            chain.append(name)
+            parents = self._own_servicetemplate(name)['parents']
+            name = parents[0] if parents else None
+        return chain
+
+    def host_chain(self, name, seen=None):
+        """
+        Host templates reached from `name` depth first, in priority order.
+        """
+        seen = seen if seen is not None else list()
+        if name in self.hosttemplates and name not in seen:
+            seen.append(name)
+            for parent in self._own_hosttemplate(name)['parents']:
+                self.host_chain(parent, seen)
+        return seen
+
+    #### Effective attributes
+    def service_macros(self, name):
+        """
+        Macros a service using the `name` template inherits, by bare name.
+        """
+        def resolve():
+            macros = dict()
+            for template in reversed(self.service_chain(name)):
+                macros.update(self._own_servicetemplate(template)['macros'])
+            return macros
+        return self._memo(self._effective, ('STPL macros', name), resolve)
+
+    def service_command(self, name):
+        """
+        Check command and arguments a service using the `name` template runs.
+        """
+        def resolve():
+            command = arguments = None
+            for template in self.service_chain(name):
+                own = self._own_servicetemplate(template)
+                command = command or own['command']
+                arguments = arguments or own['arguments']
+            return command, arguments
+        return self._memo(self._effective, ('STPL command', name), resolve)
+
+    def host_macros(self, templates):
+        """
+        Macros a host using `templates` (in priority order) inherits, by bare name.
+        """
+        def resolve():
+            macros = dict()
+            for template in templates:
+                for inherited in self.host_chain(template):
+                    for key, macro in self._own_hosttemplate(inherited)['macros'].items():
+                        macros.setdefault(key, macro)
+            return macros
+        return self._memo(self._effective, ('HTPL macros', tuple(templates)), resolve)
@@ -1,64 +1,128 @@
-def update_macros(obj, macros, data):
-    has_changed = False
-    m_state, m_list = obj.getmacro()
-    if m_list is None:
-        m_list = {}
-    for k in macros:
-        if k.get('name').find("$_HOST") == 0:
-            current_macro = m_list.get(k.get('name'))
-        else:
-            current_macro = m_list.get('$_HOST' + k.get('name').upper() + '$')
-        if current_macro is None and (k.get('state') == "present" or k.get('state') is None):
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible_collections.community.centreon.plugins.module_utils.centreon_snapshot import concurrently, host_snapshot
+
+try:
+    from centreonapi.webservice.configuration.command import Command
+    from centreonapi.webservice.configuration.host import Host
+    from centreonapi.webservice.configuration.service import Service
+except ImportError:
+    pass
+
+
+def macro_prefix(obj):
+    # Services and service templates use $_SERVICE<NAME>$, hosts and host templates $_HOST<NAME>$
+    if 'service' in obj.__class__.__name__.lower():
+        return '$_SERVICE'
+    return '$_HOST'
+
+
+def macro_name(name):
+    """
+    Bare upper-case macro name: 'foo', '$_HOSTFOO$' and '$_SERVICEFOO$' all give 'FOO'.
+    """
+    name = str(name).strip('$').upper()
+    for prefix in ('_HOST', '_SERVICE'):
+        if name.startswith(prefix):
+            return name[len(prefix):]
+    return name
+
+
+class MacroIndex(object):
+    """
+    Existing macros of an object, indexed by bare name, from a single getmacro().
+    """
+
+    def __init__(self, obj):
+        self.prefix = macro_prefix(obj)
+        s, m_list = obj.getmacro()
+        if not s:
+            raise Exception('Unable to get macros: %s' % m_list)
+        self.macros = dict()
+        for engine_name, macro in (m_list or {}).items():
+            self.macros[macro_name(engine_name)] = macro
+
+    @staticmethod
+    def differs(current, wanted):
+        return not str(current.value) == str(wanted.get('value')) \
+            or not int(current.is_password or 0) == int(wanted.get('is_password') or 0) \
+            or not (current.description or '') == (wanted.get('description') or '')
+
+    @staticmethod
+    def inherits(inherited, wanted):
+        return inherited is not None and str(inherited.value) == str(wanted.get('value')) \
+            and int(inherited.is_password or 0) == int(wanted.get('is_password') or 0)
+
+    def diff(self, macros, inherited=None):
+        """
+        Return the macros to add, to update and the names to delete. Macros
+        missing on the object but `inherited` at the same value are not added.
+        """
+        inherited = inherited or {}
+        add, update, delete = list(), list(), list()
+        for k in macros:
+            name = macro_name(k.get('name'))
+            current = self.macros.get(name)
+            if k.get('state', "present") == "absent":
+                if current is not None and name not in delete:
+                    delete.append(name)
+            elif current is None:
+                if not self.inherits(inherited.get(name), k):
+                    add.append(dict(k, name=name))
+            elif self.differs(current, k):
+                update.append(dict(k, name=name))
+        return add, update, delete
+
+
+def update_macros(obj, macros, data, inherited=None):
+    index = MacroIndex(obj)
+    add, update, delete = index.diff(macros, inherited)
+
+    for action, todo in (("Add", add), ("Update", update)):
+        for k in todo:
             s, m = obj.setmacro(
                 name=k.get('name'),
                 value=k.get('value'),
                 is_password=k.get('is_password'),
                 description=k.get('description'))
-            if s:
-                has_changed = True
-                data.append("Add macros %s" % k.get('name').upper())
-            else:
+            if not s:
                 raise Exception('Unable to set macro %s: %s' % (k.get('name'), m))
-        elif current_macro is not None and k.get('state') == "absent":
-            s, m = obj.deletemacro(k.get('name'))
-            if s:
-                has_changed = True
-                data.append("Delete macros %s" % k.get('name'))
-            else:
-                raise Exception('Unable to delete macro %s: %s' % (k.get('name'), m))
-        elif current_macro is not None and (k.get('state') == "present" or k.get('state') is None):
-            if not current_macro.value == k.get('value') \
-                    or not int(current_macro.is_password) == int(k.get('is_password', 0)) \
-                    or not current_macro.description == k.get('description', ''):
-                s, m = obj.setmacro(
-                    name=k.get('name'),
-                    value=k.get('value'),
-                    is_password=k.get('is_password'),
-                    description=k.get('description'))
-                if s:
-                    has_changed = True
-                    data.append("Update macros %s" % k.get('name'))
-                else:
-                    raise Exception('Unable to set macro %s: %s' % (k.get('name'), m))
+            data.append("%s macros %s%s$" % (action, index.prefix, k.get('name')))
 
-    return has_changed
+    # CLAPI delmacro takes a single macro name
+    for name in delete:
+        s, m = obj.deletemacro(name)
+        if not s:
+            raise Exception('Unable to delete macro %s: %s' % (name, m))
+        data.append("Delete macros %s%s$" % (index.prefix, name))
+
+    return bool(add or update or delete)
 
 
 def update_params(obj, params, data):
-    _, _ = obj.getparams()
+    wanted = dict()
     for k in params:
         pname = k.get('name')
         if not pname:
             raise Exception('Param with empty name!')
+        wanted[pname] = k.get('value')
 
-        pvalue = k.get('value')
-        data.append(f"Setting parameter {pname}")
-        if pvalue != obj.params.get(pname):
-            s, h = obj.setparam(pname, pvalue)
-            if s:
-                return True
-            else:
-                raise Exception(f'Unable to set param {pname}: {h}')
+    s, current = obj.getparams()
+    if not s:
+        raise Exception(f'Unable to get params: {current}')
+    current = current or {}
+
+    # CLAPI sets one parameter per call: only push the ones that differ
+    changed = [pname for pname, pvalue in wanted.items()
+               if pvalue is not None and str(pvalue) != str(current.get(pname))
+               or pvalue is None and current.get(pname) not in (None, '')]
+    for pname in changed:
+        s, h = obj.setparam(pname, wanted[pname])
+        if not s:
+            raise Exception(f'Unable to set param {pname}: {h}')
+        data.append(f"Set parameter {pname}: {current.get(pname)} -> {wanted[pname]}")
+
+    return bool(changed)
 
 
 def update_contacts(obj, contacts, data):
@@ -117,3 +181,480 @@ def update_contactgroups(obj, contactgroups, data):
                 raise Exception('Unable to delete contact group %s: %s' % (contact_name, m))
 
     return has_changed
+
+
+def update_status(obj, status, data):
+    if status == "disabled" and int(obj.activate) == 1:
+        s, m = obj.disable()
+        if s:
+            data.append("Disabled")
+            return True
+        raise Exception(f'Unable to disable {obj}: {m}')
+    if status == "enabled" and int(obj.activate) == 0:
+        s, m = obj.enable()
+        if s:
+            data.append("Enabled")
+            return True
+        raise Exception(f'Unable to enable {obj}: {m}')
+    return False
+
+
+def update_hostgroups(host, hostgroups, data):
+    has_changed = False
+    hg_state, hg_list = host.gethostgroup()
+    if not hg_state:
+        return has_changed
+    if hg_list is None:
+        hg_list = {}
+
+    del_hostgroup = list()
+    add_hostgroup = list()
+    for hgp in hostgroups:
+        if hgp.get('name') in hg_list and hgp.get('state') == 'absent':
+            del_hostgroup.append(hgp.get('name'))
+        elif hgp.get('name') not in hg_list and hgp.get('state', "present") == "present":
+            add_hostgroup.append(hgp.get('name'))
+
+    if add_hostgroup:
+        s, h = host.addhostgroup(add_hostgroup)
+        if s:
+            has_changed = True
+            data.append("Add HostGroup: %s" % add_hostgroup)
+        else:
+            raise Exception('Unable to add hostgroup: %s, %s' % (add_hostgroup, h))
+
+    if del_hostgroup:
+        s, h = host.deletehostgroup(del_hostgroup)
+        if s:
+            has_changed = True
+            data.append("Del HostGroup: %s" % del_hostgroup)
+        else:
+            raise Exception('Unable to delete hostgroup: %s, %s' % (del_hostgroup, h))
+
+    return has_changed
+
+
+def update_hosttemplates(host, hosttemplates, data):
+    has_changed = False
+    ht_state, ht_list = host.gettemplate()
+    if not ht_state:
+        return has_changed
+    if ht_list is None:
+        ht_list = {}
+
+    del_host_template = list()
+    add_host_template = list()
+    for tmpl in hosttemplates:
+        if tmpl.get('name') in ht_list and tmpl.get('state') == "absent":
+            del_host_template.append(tmpl.get('name'))
+        elif tmpl.get('name') not in ht_list and tmpl.get('state', "present") == "present":
+            add_host_template.append(tmpl.get('name'))
+
+    if add_host_template:
+        s, h = host.addtemplate(add_host_template)
+        if s:
+            has_changed = True
+            data.append("Add HostTemplate: %s" % add_host_template)
+        else:
+            raise Exception('Unable to add hostTemplate: %s' % add_host_template)
+
+    if del_host_template:
+        s, h = host.deletetemplate(del_host_template)
+        if s:
+            has_changed = True
+            data.append("Del HostTemplate: %s" % del_host_template)
+        else:
+            raise Exception('Unable to del hostTemplate: %s' % del_host_template)
+
+    return has_changed
+
+
+def apply_template(host, data):
+    """
+    Regenerate the services of a host from its templates. Callers plan every
+    template change first and call it once, as each call is expensive.
+    """
+    s, m = host.applytemplate()
+    if not s:
+        raise Exception('Unable to apply templates of host %s: %s' % (host.name, m))
+    data.append("Applied templates")
+    return True
+
+
+def apply_templates(hosts, max_workers=1):
+    """
+    Run apply_template() once for each of `hosts` (name -> (host, data)), at most
+    `max_workers` at a time. Return the errors, by host name.
+    """
+    def run(item):
+        name, (host, data) = item
+        try:
+            apply_template(host, data)
+        except Exception as e:
+            return name, str(e)
+        return name, None
+
+    if max_workers > 1 and len(hosts) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(run, hosts.items()))
+    else:
+        results = [run(item) for item in hosts.items()]
+    return dict((name, error) for name, error in results if error)
+
+
+def present_names(items):
+    return [i.get('name') for i in items or [] if i.get('state', "present") == "present"]
+
+
+def reconcile_host(centreon, hosts, spec, data, to_apply=None):
+    """
+    Converge one host described like the centreon_host options against
+    `hosts`, a name -> Host index fetched beforehand with hosts.list().
+
+    Templates are applied once if the host was created with templates or its
+    templates changed. With a `to_apply` dict, the host is added to it instead,
+    for apply_templates() to run later with the other hosts.
+    """
+    has_changed = False
+    templates_changed = False
+    name = spec.get('name')
+    alias = spec.get('alias')
+    ipaddr = spec.get('ipaddr')
+    instance = spec.get('instance') or 'Central'
+    host = hosts.get(name)
+
+    if spec.get('state', "present") == "absent":
+        if host is None:
+            return has_changed
+        s, m = centreon.hosts.delete(host, post_refresh=False)
+        if not s:
+            raise Exception('Unable to delete host %s: %s' % (name, m))
+        del hosts[name]
+        data.append("Host %s deleted" % name)
+        return True
+
+    if host is None:
+        s, m = centreon.hosts.add(
+            name,
+            alias,
+            ipaddr,
+            instance,
+            present_names(spec.get('hosttemplates')),
+            present_names(spec.get('hostgroups')),
+            post_refresh=False
+        )
+        if not s:
+            raise Exception('Unable to create host %s: %s' % (name, m))
+        host = Host({'name': name, 'alias': alias, 'address': ipaddr, 'activate': '1'})
+        hosts[name] = host
+        templates_changed = bool(present_names(spec.get('hosttemplates')))
+        has_changed = True
+        data.append("Add host: %s" % name)
+
+    host = host_snapshot(host, spec)
+
+    if update_status(host, spec.get('status') or "enabled", data):
+        has_changed = True
+
+    if ipaddr and not host.address == ipaddr:
+        s, m = host.setparam('address', ipaddr)
+        if not s:
+            raise Exception('Unable to change ip add: %s' % m)
+        data.append("Change ip addr: %s -> %s" % (host.address, ipaddr))
+        host.address = ipaddr
+        has_changed = True
+
+    if alias and not host.alias == alias:
+        s, m = host.setparam('alias', alias)
+        if not s:
+            raise Exception('Unable to change alias %s: %s' % (alias, m))
+        data.append("Change alias: %s -> %s" % (host.alias, alias))
+        host.alias = alias
+        has_changed = True
+
+    if spec.get('hostgroups') and update_hostgroups(host, spec['hostgroups'], data):
+        has_changed = True
+
+    if spec.get('hosttemplates') and update_hosttemplates(host, spec['hosttemplates'], data):
+        templates_changed = True
+        has_changed = True
+
+    if templates_changed:
+        if to_apply is None:
+            apply_template(host, data)
+        else:
+            to_apply[name] = (host, data)
+
+    for key, update in (('contacts', update_contacts),
+                        ('contactgroups', update_contactgroups),
+                        ('macros', update_macros),
+                        ('params', update_params)):
+        if spec.get(key) and update(host, spec[key], data):
+            has_changed = True
+
+    return has_changed
+
+
+def host_pollers(centreon, pollers):
+    """
+    Poller of each host of `pollers`, as a host name -> poller name index,
+    with one gethosts call per poller, all at the same time.
+    """
+    webservice = centreon.hosts.webservice
+
+    def gethosts(poller):
+        def call():
+            s, res = webservice.call_clapi('gethosts', 'INSTANCE', poller)
+            if not s:
+                raise Exception('Unable to list hosts of poller %s: %s' % (poller, res))
+            return res.get('result', [])
+        return call
+
+    pollers = list(pollers)
+    index = dict()
+    for poller, hosts in zip(pollers, concurrently(*[gethosts(p) for p in pollers])):
+        for h in hosts:
+            index[h.get('name')] = poller
+    return index
+
+
+def list_host_services(centreon, host):
+    """
+    Fetch the services of one host in a single call, as a description -> Service index.
+    """
+    s, res = centreon.services.webservice.call_clapi('show', 'SERVICE', host)
+    if not s:
+        raise Exception('Unable to list services of host %s: %s' % (host, res))
+    services = dict()
+    for properties in res.get('result', []):
+        # 'show' filters on a substring of host name or description
+        if properties.get('host name') == host:
+            services[properties.get('description')] = Service(properties)
+    return services
+
+
+def list_services(centreon):
+    """
+    Fetch every service in a single call, as a host -> description -> Service index.
+    """
+    s, res = centreon.services.webservice.call_clapi('show', 'SERVICE')
+    if not s:
+        raise Exception('Unable to list services: %s' % res)
+    services = dict()
+    for properties in res.get('result', []):
+        services.setdefault(properties.get('host name'), dict())[properties.get('description')] = Service(properties)
+    return services
+
+
+def reconcile_service(centreon, services, spec, data):
+    """
+    Converge one service described like the centreon_service options against
+    `services`, the index of its host returned by list_host_services().
+    """
+    has_changed = False
+    host = spec.get('host')
+    name = spec.get('name')
+    service = services.get(name)
+
+    if spec.get('state', "present") == "absent":
+        if service is None:
+            return has_changed
+        s, m = centreon.services.webservice.call_clapi('del', 'SERVICE', [host, name])
+        if not s:
+            raise Exception('Unable to delete service %s for host %s: %s' % (name, host, m))
+        del services[name]
+        data.append("Service %s deleted" % name)
+        return True
+
+    if service is None:
+        template = spec.get('servicetemplate')
+        s, m = centreon.services.webservice.call_clapi('add', 'SERVICE', [host, name, template])
+        if not s:
+            raise Exception('Unable to create service %s for host %s: %s' % (name, host, m))
+        service = Service({'host name': host, 'description': name, 'activate': '1'})
+        services[name] = service
+        has_changed = True
+        data.append("Added service: %s on %s" % (name, host))
+
+    if update_status(service, spec.get('status') or "enabled", data):
+        has_changed = True
+
+    for key, update in (('macros', update_macros),
+                        ('params', update_params),
+                        ('contacts', update_contacts),
+                        ('contactgroups', update_contactgroups)):
+        if spec.get(key) and update(service, spec[key], data):
+            has_changed = True
+
+    return has_changed
+
+
+def reconcile_command(centreon, commands, spec, data):
+    """
+    Converge one command described like the centreon_command options against
+    `commands`, a name -> Command index fetched beforehand with commands.list().
+    graph, example and comment cannot be read back, they are only set on creation.
+    """
+    has_changed = False
+    name = spec.get('name')
+    cmd_type = spec.get('type') or 'check'
+    line = spec.get('line')
+    cmd = commands.get(name)
+
+    if spec.get('state', "present") == "absent":
+        if cmd is None:
+            return has_changed
+        s, m = centreon.commands.delete(name, post_refresh=False)
+        if not s:
+            raise Exception('Unable to delete command %s: %s' % (name, m))
+        del commands[name]
+        data.append("Command %s deleted" % name)
+        return True
+
+    if cmd is None:
+        s, m = centreon.commands.add(name, cmd_type, line, post_refresh=False)
+        if not s:
+            raise Exception('Unable to create command %s: %s' % (name, m))
+        cmd = Command({'name': name, 'type': cmd_type, 'line': line})
+        commands[name] = cmd
+        for param in ('graph', 'example', 'comment'):
+            if spec.get(param):
+                s, m = cmd.setparam(param, spec[param])
+                if not s:
+                    raise Exception('Unable to set %s of command %s: %s' % (param, name, m))
+        data.append("Added command: %s type %s" % (name, cmd_type))
+        return True
+
+    if cmd_type != cmd.type:
+        s, m = cmd.setparam('type', cmd_type)
+        if not s:
+            raise Exception('Unable to change type of command %s: %s' % (name, m))
+        data.append("Change type: %s -> %s" % (cmd.type, cmd_type))
+        cmd.type = cmd_type
+        has_changed = True
+
+    if line is not None and line != cmd.line:
+        s, m = cmd.setparam('line', line)
+        if not s:
+            raise Exception('Unable to change line of command %s: %s' % (name, m))
+        data.append("Change line of command %s" % name)
+        cmd.line = line
+        has_changed = True
+
+    return has_changed
+
+
+def reconcile_servicetemplate(centreon, templates, spec, data):
+    """
+    Converge one service template described like the centreon_servicetemplate
+    options against `templates`, a name -> object index fetched beforehand
+    with servicetemplates.list().
+    """
+    has_changed = False
+    name = spec.get('name')
+    template = templates.get(name)
+
+    if spec.get('state', "present") == "absent":
+        if template is None:
+            return has_changed
+        s, m = centreon.servicetemplates.webservice.call_clapi('del', 'STPL', name)
+        if not s:
+            raise Exception('Unable to delete service template %s: %s' % (name, m))
+        del templates[name]
+        data.append("Service template %s deleted" % name)
+        return True
+
+    if template is None:
+        s, m = centreon.servicetemplates.webservice.call_clapi(
+            'add', 'STPL', [name, spec.get('alias') or name, spec.get('template') or ''])
+        if not s:
+            raise Exception('Unable to create service template %s: %s' % (name, m))
+        s, template = centreon.servicetemplates.get(name)
+        if not s:
+            raise Exception('Unable to find service template %s after creation' % name)
+        templates[name] = template
+        has_changed = True
+        data.append("Added service template: %s" % name)
+
+    if update_status(template, spec.get('status') or "enabled", data):
+        has_changed = True
+
+    for key, update in (('contacts', update_contacts),
+                        ('contactgroups', update_contactgroups),
+                        ('macros', update_macros),
+                        ('params', update_params)):
+        if spec.get(key) and update(template, spec[key], data):
+            has_changed = True
+
+    return has_changed
+
+
+def reconcile_hostgroup(centreon, hostgroups, spec, data):
+    """
+    Converge one hostgroup described like an item of the centreon_hostgroup
+    `hg` option against `hostgroups`, the index returned by hostgroups.list().
+    """
+    name = spec.get('name')
+    exists = name in hostgroups
+
+    if spec.get('state', "present") == "absent":
+        if not exists:
+            return False
+        s, m = centreon.hostgroups.delete(name)
+        if not s:
+            raise Exception('Unable to delete hostgroup %s: %s' % (name, m))
+        del hostgroups[name]
+        data.append("Hostgroup %s deleted" % name)
+        return True
+
+    if exists:
+        return False
+    s, m = centreon.hostgroups.add(name, spec.get('alias') or name)
+    if not s:
+        raise Exception('Unable to create hostgroup %s: %s' % (name, m))
+    hostgroups[name] = spec
+    data.append("Added hostgroup: %s" % name)
+    return True
+
+
+class ReconcileError(Exception):
+
+    def __init__(self, msg, changed):
+        super(ReconcileError, self).__init__(msg)
+        self.changed = changed
+
+
+def run_reconcilers(obj, steps, data, max_workers=1):
+    """
+    Run independent update_* helpers on `obj`, at most `max_workers` at a time.
+
+    `steps` is a list of (label, helper, items); steps without items are
+    skipped. Messages are appended to `data` and errors reported in the order
+    of `steps`, whatever the order in which the helpers completed.
+    """
+    steps = [(label, update, items) for label, update, items in steps if items]
+
+    def run(step):
+        label, update, items = step
+        step_data = list()
+        try:
+            return update(obj, items, step_data), step_data, None
+        except Exception as e:
+            return False, step_data, f"Failed to update {label}: {str(e)}"
+
+    if max_workers > 1 and len(steps) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(run, steps))
+    else:
+        results = [run(step) for step in steps]
+
+    has_changed = False
+    errors = list()
+    for changed, step_data, error in results:
+        has_changed = has_changed or bool(changed)
+        data.extend(step_data)
+        if error:
+            errors.append(error)
+    if errors:
+        raise ReconcileError("; ".join(errors), has_changed)
+    return has_changed
@@ -20,18 +20,6 @@ description: Manage Centreon commands.
 short_description: Manage Centreon commands
 
 options:
-  url:
-    description:
-      - Centreon URL
-    required: True
-  username:
-    description:
-      - Centreon API username
-    required: True
-  password:
-    description:
-      - Centreon API username's password
-    required: True
   instance:
     description:
       - Poller instance
@@ -39,13 +27,10 @@ options:
   applycfg:
     description:
       - Apply configuration on poller
+      - With C(deferred), only report the poller as dirty in C(deferred_applycfg) so that the
+        C(community.centreon.centreon_applycfg) callback applies it once at the end of the play.
     default: True
-    choices: ['True','False']
-  validate_certs:
-    type: bool
-    default: yes
-    description:
-      - If C(no), SSL certificates will not be validated.
+    choices: ['True', 'False', 'deferred']
   name:
     description:
       - Command name
@@ -67,6 +52,10 @@ options:
       - Create / Delete command on Centreon
     default: present
     choices: ['present', 'absent']
+extends_documentation_fragment:
+  - community.centreon.centreon
+  - community.centreon.centreon.applycfg
+  - community.centreon.centreon.object_cache
 requirements:
   - Python Centreon API
 author:
@@ -89,8 +78,11 @@ EXAMPLES = '''
 # =============================================
 # Centreon module API Rest
 #
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_applycfg, centreon_args, centreon_client, centreon_perf, centreon_profile
+)
+
 try:
-    from centreonapi.centreon import Centreon
     from centreonapi import __version__ as centreonapi_version
 except ImportError:
     centreonapi_found = False
@@ -98,12 +90,11 @@ else:
     centreonapi_found = True
 
 
+@centreon_profile.profiled('centreon_command')
 def main():
     module = AnsibleModule(
-        argument_spec=dict(
-            url=dict(required=True),
-            username=dict(default='admin', no_log=True),
-            password=dict(default='centreon', no_log=True),
+        argument_spec=centreon_args.argument_spec(
+            centreon_args.APPLYCFG, centreon_args.OBJECT_CACHE,
             instance=dict(list(), default='Central'),
             name=dict(required=True),
             type=dict(default='check', choices=['check', 'notif', 'misc', 'discovery']),
@@ -111,15 +102,21 @@ def main():
             graph=dict(default=None),
             example=dict(default=None),
             comment=dict(default=None),
-            applycfg=dict(default=True, type='bool'),
+            applycfg=dict(default=True, type='raw'),
             state=dict(default='present', choices=['present', 'absent']),
-            validate_certs=dict(default=True, type='bool'),
         )
     )
 
     if not centreonapi_found or packaging.version.parse(centreonapi_version) < packaging.version.parse("0.2.0"):
         module.fail_json(msg="Python centreonapi >= 0.2.0 module is required")
 
+    tracer = centreon_perf.attach(module)
+
+    try:
+        applycfg = centreon_applycfg.parse(module.params["applycfg"])
+    except TypeError as e:
+        module.fail_json(msg="Invalid applycfg: %s" % e)
+
     url = module.params["url"]
     username = module.params["username"]
     password = module.params["password"]
@@ -130,14 +127,19 @@ def main():
     graph = module.params["graph"]
     example = module.params["example"]
     comment = module.params["comment"]
-    applycfg = module.params["applycfg"]
     state = module.params["state"]
+    applycfg_debounce = module.params["applycfg_debounce"]
     validate_certs = module.params["validate_certs"]
+    token_cache = module.params["token_cache"]
+    token_cache_ttl = module.params["token_cache_ttl"]
+    object_cache = module.params["object_cache"]
 
     has_changed = False
 
     try:
-        centreon = Centreon(url, username, password, check_ssl=validate_certs)
+        centreon = centreon_client.connect(url, username, password, check_ssl=validate_certs,
+                                           token_cache=token_cache, token_cache_ttl=token_cache_ttl,
+                                           socket_path=module._socket_path, object_cache=object_cache, tracer=tracer)
     except Exception as e:
         module.fail_json(msg="Unable to connect to Centreon API: %s" % e)
         return
@@ -179,9 +181,11 @@ def main():
     if cmd_state and state == "absent":
         centreon.commands.delete(name)
         has_changed = True
-        if applycfg:
-            centreon.pollers.applycfg(instance)
-        module.exit_json(changed=has_changed, result="Command %s deleted" % name)
+        result = dict(changed=has_changed, result="Command %s deleted" % name)
+        applied, applied_msg = centreon_applycfg.applycfg(poller, applycfg, url, result, applycfg_debounce)
+        if not applied:
+            module.warn(f"Unable to apply configuration on poller {instance}: {applied_msg}")
+        module.exit_json(**result)
         return
 
     try:
@@ -207,14 +211,16 @@ def main():
     except Exception as e:
         module.fail_json(msg=f"Failed to set params {str(e)}: {cmd}")
 
+    result = dict(changed=has_changed, msg=data)
     try:
-        if applycfg:
-            centreon.pollers.applycfg(instance)
-            has_changed = True
+        if has_changed:
+            applied, applied_msg = centreon_applycfg.applycfg(poller, applycfg, url, result, applycfg_debounce)
+            if not applied:
+                module.warn(f"Unable to apply configuration on poller {instance}: {applied_msg}")
     except Exception as exc:
         module.fail_json(msg=str(exc))
 
-    module.exit_json(changed=has_changed, msg=data)
+    module.exit_json(**result)
 
 
 if __name__ == '__main__':
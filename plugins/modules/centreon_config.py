@@ -0,0 +1,293 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import packaging.version
+# import module snippets
+from ansible.module_utils.basic import AnsibleModule
+
+ANSIBLE_METADATA = {
+    'status': ['preview'],
+    'supported_by': 'community',
+    'metadata_version': '0.1',
+    'version': '0.1'
+}
+
+DOCUMENTATION = '''
+---
+module: centreon_config
+version_added: "2.9"
+description:
+  - Converge a whole Centreon configuration (commands, service templates, hostgroups, hosts
+    with their memberships, and services) in a single task.
+  - Lists each kind of object once, compares it with the wanted configuration and only touches
+    the objects that are missing, superfluous or differ. Objects are created in dependency order
+    (commands, service templates, hostgroups, hosts, services) and deleted in the reverse order.
+  - The configuration is applied once per affected poller at the end.
+short_description: Manage a whole Centreon configuration
+
+options:
+  commands:
+    description:
+      - List of commands, each one accepting the options of M(community.centreon.centreon_command)
+        (name, type, line, graph, example, comment, state). graph, example and comment are only
+        set when the command is created.
+    type: list
+  servicetemplates:
+    description:
+      - List of service templates, each one accepting the options of
+        M(community.centreon.centreon_servicetemplate) (name, alias, template, params, macros,
+        contacts, contactgroups, state, status).
+    type: list
+  hostgroups:
+    description:
+      - List of hostgroups (name, alias, state).
+    type: list
+  hosts:
+    description:
+      - List of hosts, each one accepting the options of M(community.centreon.centreon_host)
+        (name, alias, ipaddr, instance, hosttemplates, hostgroups, params, macros, contacts,
+        contactgroups, state, status).
+    type: list
+  services:
+    description:
+      - List of services, each one accepting the options of M(community.centreon.centreon_service)
+        (host, name, servicetemplate, params, macros, contacts, contactgroups, state, status).
+    type: list
+  instance:
+    description:
+      - Poller applied when commands, service templates, hostgroups or services of hosts not listed
+        in C(hosts) change.
+    default: Central
+  applycfg:
+    description:
+      - Apply configuration on each affected poller, once at the end
+      - With C(deferred), only report the poller as dirty in C(deferred_applycfg) so that the
+        C(community.centreon.centreon_applycfg) callback applies it once at the end of the play.
+    default: True
+    choices: ['True', 'False', 'deferred']
+  batch:
+    type: bool
+    default: no
+    description:
+      - Queue the changes and send them at the end as a single CLAPI import file (C(centreon -i))
+        instead of one API call each. Reads still go through the API.
+      - The module must run on the Centreon central server, for instance with C(delegate_to).
+  batch_command:
+    default: centreon
+    description:
+      - Path of the CLAPI command line on the Centreon central server. It is run with C(-u) and C(-i),
+        the password is written to its prompt rather than passed with C(-p).
+extends_documentation_fragment:
+  - community.centreon.centreon
+  - community.centreon.centreon.applycfg
+requirements:
+  - Python Centreon API
+author:
+    - Jérôme Martin
+'''
+
+EXAMPLES = '''
+- community.centreon.centreon_config:
+    url: "{{ centreon_url }}"
+    username: "{{ centreon_api_user }}"
+    password: "{{ centreon_api_pass }}"
+    commands:
+      - name: check_http_custom
+        line: '$USER1$/check_http -H $HOSTADDRESS$ -u $_SERVICEURI$'
+    servicetemplates:
+      - name: App-HTTP
+        alias: HTTP
+        template: generic-active-service
+        params:
+          - name: check_command
+            value: check_http_custom
+    hostgroups:
+      - name: Web-Servers
+    hosts:
+      - name: web01
+        alias: web01.company.net
+        ipaddr: 10.0.0.11
+        hosttemplates:
+          - name: OS-Linux-SNMP-custom
+        hostgroups:
+          - name: Web-Servers
+    services:
+      - host: web01
+        name: HTTP
+        servicetemplate: App-HTTP
+  delegate_to: localhost
+  run_once: true
+'''
+
+# =============================================
+# Centreon module API Rest
+#
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_applycfg, centreon_args, centreon_batch, centreon_client, centreon_diff, centreon_perf, centreon_profile,
+    centreon_snapshot, centreon_utils
+)
+
+try:
+    from centreonapi import __version__ as centreonapi_version
+except ImportError:
+    centreonapi_found = False
+else:
+    centreonapi_found = True
+
+
+@centreon_profile.profiled('centreon_config')
+def main():
+    module = AnsibleModule(
+        argument_spec=centreon_args.argument_spec(
+            centreon_args.APPLYCFG,
+            commands=dict(type='list', default=[]),
+            servicetemplates=dict(type='list', default=[]),
+            hostgroups=dict(type='list', default=[]),
+            hosts=dict(type='list', default=[]),
+            services=dict(type='list', default=[]),
+            instance=dict(default='Central'),
+            applycfg=dict(default=True, type='raw'),
+            batch=dict(default=False, type='bool'),
+            batch_command=dict(default='centreon'),
+        )
+    )
+
+    if not centreonapi_found or packaging.version.parse(centreonapi_version) < packaging.version.parse("0.2.0"):
+        module.fail_json(msg="Python centreonapi >= 0.2.0 module is required")
+
+    tracer = centreon_perf.attach(module)
+
+    try:
+        applycfg = centreon_applycfg.parse(module.params["applycfg"])
+    except TypeError as e:
+        module.fail_json(msg="Invalid applycfg: %s" % e)
+
+    url = module.params["url"]
+    username = module.params["username"]
+    password = module.params["password"]
+    instance = module.params["instance"]
+    applycfg_debounce = module.params["applycfg_debounce"]
+    batch_import = module.params["batch"]
+    batch_command = module.params["batch_command"]
+    validate_certs = module.params["validate_certs"]
+    token_cache = module.params["token_cache"]
+    token_cache_ttl = module.params["token_cache_ttl"]
+
+    specs = dict((kind, module.params[kind] or []) for kind in centreon_diff.KINDS)
+    for kind, items in specs.items():
+        for spec in items:
+            if not isinstance(spec, dict) or not spec.get('name') or (kind == 'services' and not spec.get('host')):
+                module.fail_json(msg="Each item of %s must be a dict with a name%s: %s"
+                                 % (kind, " and a host" if kind == 'services' else "", spec))
+
+    has_changed = False
+
+    try:
+        centreon = centreon_client.connect(url, username, password, check_ssl=validate_certs,
+                                           token_cache=token_cache, token_cache_ttl=token_cache_ttl,
+                                           socket_path=module._socket_path, tracer=tracer)
+    except Exception as e:
+        module.fail_json(msg="Unable to connect to Centreon API: %s" % str(e))
+        return
+
+    batch = None
+    if batch_import:
+        batch = centreon_batch.Batch()
+        centreon_batch.use_batch(centreon.hosts.webservice, batch)
+
+    #### Actual state, one listing per kind of object
+    try:
+        pollers, commands, templates, hostgroups, hosts, services = centreon_snapshot.concurrently(
+            lambda: dict(centreon.pollers.list()),
+            lambda: dict(centreon.commands.list()) if specs['commands'] else dict(),
+            lambda: dict(centreon.servicetemplates.list()) if specs['servicetemplates'] else dict(),
+            lambda: dict(centreon.hostgroups.list()) if specs['hostgroups'] else dict(),
+            lambda: dict(centreon.hosts.list()) if specs['hosts'] else dict(),
+            lambda: centreon_utils.list_services(centreon) if specs['services'] else dict())
+    except Exception as e:
+        module.fail_json(msg="Unable to list the Centreon configuration: {}".format(e))
+        return
+
+    existing = dict(commands=commands, servicetemplates=templates, hostgroups=hostgroups, hosts=hosts,
+                    services=dict(((h, name), s) for h, by_name in services.items() for name, s in by_name.items()))
+
+    #### Minimal change set
+    plans = dict((kind, centreon_diff.plan(kind, specs[kind], existing[kind])) for kind in centreon_diff.KINDS)
+
+    host_instances = dict((spec['name'], spec.get('instance') or 'Central') for spec in specs['hosts'])
+    for instance_name in set(host_instances.values()) | set([instance]):
+        if instance_name not in pollers:
+            module.fail_json(msg="Poller '%s' does not exists" % instance_name)
+            return
+
+    def reconcile(kind, spec, data):
+        if kind == 'commands':
+            return centreon_utils.reconcile_command(centreon, commands, spec, data)
+        if kind == 'servicetemplates':
+            return centreon_utils.reconcile_servicetemplate(centreon, templates, spec, data)
+        if kind == 'hostgroups':
+            return centreon_utils.reconcile_hostgroup(centreon, hostgroups, spec, data)
+        if kind == 'hosts':
+            return centreon_utils.reconcile_host(centreon, hosts, spec, data)
+        return centreon_utils.reconcile_service(centreon, services.setdefault(spec['host'], dict()), spec, data)
+
+    def poller_of(kind, spec):
+        if kind == 'hosts':
+            return host_instances[spec['name']]
+        if kind == 'services':
+            return host_instances.get(spec['host'], instance)
+        return instance
+
+    # Creations and updates in dependency order, then deletions in reverse order
+    steps = [(kind, spec) for kind in centreon_diff.KINDS for spec in specs[kind]
+             if spec.get('state', 'present') == 'present']
+    steps += [(kind, spec) for kind in reversed(centreon_diff.KINDS) for spec in specs[kind]
+              if spec.get('state', 'present') == 'absent']
+
+    results = list()
+    dirty_pollers = set()
+
+    for kind, spec in steps:
+        if centreon_diff.spec_key(kind, spec) not in plans[kind].todo():
+            continue
+        data = list()
+        try:
+            with centreon_batch.labelled(batch, (kind, spec.get('host'), spec['name'])):
+                changed = reconcile(kind, spec, data)
+        except Exception as e:
+            module.fail_json(msg="%s %s: %s - %s" % (kind, centreon_diff.spec_key(kind, spec), e, data),
+                             changed=has_changed, results=results)
+            return
+        results.append(dict(kind=kind, name=spec['name'], changed=changed, msg=data))
+        if kind == 'services':
+            results[-1]['host'] = spec['host']
+        if changed:
+            has_changed = True
+            dirty_pollers.add(poller_of(kind, spec))
+
+    if batch is not None:
+        try:
+            failed = centreon_batch.failed_labels(
+                batch.flush(centreon_batch.ImportSender(username, password, batch_command)))
+        except Exception as e:
+            module.fail_json(msg="Unable to import the CLAPI batch: %s" % e, changed=has_changed, results=results)
+            return
+        if centreon_batch.report(results, failed, lambda r: (r['kind'], r.get('host'), r['name'])):
+            module.fail_json(msg="CLAPI import failed for %d objects" % len(failed), changed=has_changed,
+                             results=results)
+            return
+
+    result = dict(changed=has_changed, results=results, pollers=sorted(dirty_pollers),
+                  plan=dict((kind, p.counts()) for kind, p in plans.items()))
+    for instance_name in sorted(dirty_pollers):
+        s, m = centreon_applycfg.applycfg(pollers[instance_name], applycfg, url, result, applycfg_debounce)
+        if not s:
+            module.fail_json(msg="Unable to apply configuration on poller %s: %s" % (instance_name, m),
+                             changed=has_changed, results=results)
+            return
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -20,19 +20,6 @@ description: Manage Centreon hosts.
 short_description: Manage Centreon hosts
 
 options:
-  url:
-    description:
-      - Centreon URL
-    required: True
-
-  username:
-    description:
-      - Centreon API username
-    required: True
-  password:
-    description:
-      - Centreon API username's password
-    required: True
   name:
     description:
       - Hostname
@@ -71,11 +58,37 @@ options:
       - Enable / Disable host on Centreon
     default: enabled
     choices: c
-  validate_certs:
-    type: bool
-    default: yes
+  applycfg:
+    description:
+      - Apply configuration on poller
+      - With C(deferred), only report the poller as dirty in C(deferred_applycfg) so that the
+        C(community.centreon.centreon_applycfg) callback applies it once at the end of the play.
+    default: True
+    choices: ['True', 'False', 'deferred']
+  reconcile_workers:
+    type: int
+    default: 1
+    description:
+      - Number of threads used to update contacts, contact groups, macros and params at the same time.
+        They touch disjoint parts of the object, the default updates them one after another.
+  fingerprint:
+    type: path
     description:
-      - If C(no), SSL certificates will not be validated.
+      - Path of a state file recording, for each host, a hash of the options and of its Centreon
+        C(show) row after the last run. When both are unchanged, the module returns at once after that
+        single read, without reading or converging the rest of the host.
+      - Changes made outside of Ansible to templates, macros, params or relations do not change the
+        C(show) row, they are only seen once the entry is older than C(fingerprint_max_age).
+  fingerprint_max_age:
+    type: int
+    default: 86400
+    description:
+      - Seconds after which an entry of the fingerprint file is no longer trusted.
+extends_documentation_fragment:
+  - community.centreon.centreon
+  - community.centreon.centreon.applycfg
+  - community.centreon.centreon.mirror
+  - community.centreon.centreon.object_cache
 requirements:
   - Python Centreon API
 author:
@@ -120,10 +133,12 @@ EXAMPLES = '''
 # =============================================
 # Centreon module API Rest
 #
-from ansible_collections.community.centreon.plugins.module_utils import centreon_utils
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_applycfg, centreon_args, centreon_client, centreon_fingerprint, centreon_mirror, centreon_perf,
+    centreon_profile, centreon_snapshot, centreon_utils
+)
 
 try:
-    from centreonapi.centreon import Centreon
     from centreonapi import __version__ as centreonapi_version
 except ImportError:
     centreonapi_found = False
@@ -131,12 +146,11 @@ else:
     centreonapi_found = True
 
 
+@centreon_profile.profiled('centreon_host')
 def main():
     module = AnsibleModule(
-        argument_spec=dict(
-            url=dict(required=True),
-            username=dict(default='admin', no_log=True),
-            password=dict(default='centreon', no_log=True),
+        argument_spec=centreon_args.argument_spec(
+            centreon_args.APPLYCFG, centreon_args.MIRROR, centreon_args.OBJECT_CACHE,
             name=dict(required=True),
             hosttemplates=dict(type=list, default=None),
             alias=dict(default=None),
@@ -149,14 +163,23 @@ def main():
             contactgroups=dict(type=list, default=None),
             state=dict(default='present', choices=['present', 'absent']),
             status=dict(default='enabled', choices=['enabled', 'disabled']),
-            applycfg=dict(default=True, type='bool'),
-            validate_certs=dict(default=True, type='bool'),
+            applycfg=dict(default=True, type='raw'),
+            reconcile_workers=dict(default=1, type='int'),
+            fingerprint=dict(default=None, type='path'),
+            fingerprint_max_age=dict(default=86400, type='int'),
         )
     )
 
     if not centreonapi_found or packaging.version.parse(centreonapi_version) < packaging.version.parse("0.2.0"):
         module.fail_json(msg="Python centreonapi >= 0.2.0 module is required")
 
+    tracer = centreon_perf.attach(module)
+
+    try:
+        applycfg = centreon_applycfg.parse(module.params["applycfg"])
+    except TypeError as e:
+        module.fail_json(msg="Invalid applycfg: %s" % e)
+
     url = module.params["url"]
     username = module.params["username"]
     password = module.params["password"]
@@ -172,23 +195,54 @@ def main():
     contactgroups = module.params["contactgroups"]
     state = module.params["state"]
     status = module.params["status"]
-    applycfg = module.params["applycfg"]
+    applycfg_debounce = module.params["applycfg_debounce"]
+    reconcile_workers = module.params["reconcile_workers"]
+    mirror_path = module.params["mirror"]
+    mirror_max_age = module.params["mirror_max_age"]
+    fingerprint_path = module.params["fingerprint"]
+    fingerprint_max_age = module.params["fingerprint_max_age"]
     validate_certs = module.params["validate_certs"]
+    token_cache = module.params["token_cache"]
+    token_cache_ttl = module.params["token_cache_ttl"]
+    object_cache = module.params["object_cache"]
 
     has_changed = False
+    templates_changed = False
 
     try:
-        centreon = Centreon(url, username, password, check_ssl=validate_certs)
+        centreon = centreon_client.connect(url, username, password, check_ssl=validate_certs,
+                                           token_cache=token_cache, token_cache_ttl=token_cache_ttl,
+                                           socket_path=module._socket_path, object_cache=object_cache, tracer=tracer)
     except Exception as e:
         module.fail_json(
             msg="Unable to connect to Centreon API: %s" % str(e)
         )
         return
 
+    #### Fingerprint
+    fingerprint = None
+    if fingerprint_path:
+        fingerprint = centreon_fingerprint.FingerprintFile(fingerprint_path, fingerprint_max_age)
+        spec = centreon_fingerprint.spec_hash(module.params)
+        try:
+            marker = centreon_fingerprint.host_marker(centreon.hosts.webservice, name)
+            if fingerprint.unchanged(url, 'HOST|%s' % name, spec, marker):
+                module.exit_json(changed=False, msg=["Host %s unchanged since the last run" % name])
+        except Exception as e:
+            module.fail_json(msg="Unable to check fingerprint of host %s: %s" % (name, e))
+            return
+
+    mirror = centreon_mirror.open_mirror(mirror_path, mirror_max_age, url)
+
     try:
-        st, poller = centreon.pollers.get(instance)
+        if mirror:
+            (st, poller), (host_state, host) = mirror.get_poller(instance), mirror.get_host(name)
+        else:
+            (st, poller), (host_state, host) = centreon_snapshot.concurrently(
+                lambda: centreon.pollers.get(instance),
+                lambda: centreon.hosts.get(name))
     except Exception as e:
-        module.fail_json(msg="Unable to get pollers: {}".format(e))
+        module.fail_json(msg="Unable to get pollers and hosts: {}".format(e))
         return
 
     if not st and poller is None:
@@ -198,8 +252,6 @@ def main():
 
     data = list()
 
-    host_state, host = centreon.hosts.get(name)
-
     if not host_state and state == "present":
         try:
             data.append("Add %s %s %s %s %s %s" %
@@ -209,14 +261,16 @@ def main():
                 alias,
                 ipaddr,
                 instance,
-                hosttemplates,
-                hostgroups
+                centreon_utils.present_names(hosttemplates),
+                centreon_utils.present_names(hostgroups)
             )
-            # Apply the host templates for create associate services
             host_state, host = centreon.hosts.get(name)
-            host.applytemplate()
+            # The templates are applied once, with the template changes below
+            templates_changed = bool(centreon_utils.present_names(hosttemplates))
             has_changed = True
             data.append("Add host: %s" % name)
+            if mirror:
+                mirror.record_host(host, instance)
         except Exception as e:
             module.fail_json(msg='Create: %s - %s' % (e, data), changed=has_changed)
             return
@@ -229,14 +283,25 @@ def main():
         del_state, del_res = centreon.hosts.delete(host)
         if del_state:
             has_changed = True
-            if applycfg:
-                poller.applycfg()
-            module.exit_json(
-                changed=has_changed, result="Host %s deleted" % name
-            )
+            if mirror:
+                mirror.delete_host(name)
+            result = dict(changed=has_changed, result="Host %s deleted" % name)
+            applied, applied_msg = centreon_applycfg.applycfg(poller, applycfg, url, result, applycfg_debounce)
+            if not applied:
+                module.warn("Unable to apply configuration on poller %s: %s" % (instance, applied_msg))
+            elif fingerprint:
+                fingerprint.record(url, 'HOST|%s' % name, spec, None)
+            module.exit_json(**result)
         else:
             module.fail_json(msg='State: %s' % del_res, changed=has_changed)
 
+    # Fetch hostgroups, templates, contacts, macros and params in one concurrent pass
+    try:
+        host = centreon_snapshot.host_snapshot(host, module.params)
+    except Exception as e:
+        module.fail_json(msg="Unable to get host %s state: %s" % (name, e), changed=has_changed)
+        return
+
     if status == "disabled" and int(host.activate) == 1:
         d_state, d_res = host.disable()
         if d_state:
@@ -273,108 +338,63 @@ def main():
 
     #### HostGroup
     if hostgroups:
-        hg_state, hg_list = host.gethostgroup()
-        if hg_state:
-            hostgroup_list = list()
-            if hg_list is not None:
-                for hg in hg_list.keys():
-                    hostgroup_list.append(hg)
-            del_hostgroup = list()
-            add_hostgroup = list()
-            for hgp in hostgroups:
-                if hgp.get('name') in hostgroup_list and hgp.get('state') == 'absent':
-                    del_hostgroup.append(hgp.get('name'))
-                elif hgp.get('name') not in hostgroup_list and (
-                        hgp.get('state') == "present" or hgp.get('state') is None):
-                    add_hostgroup.append(hgp.get('name'))
-
-            if add_hostgroup:
-                s, h = host.addhostgroup(add_hostgroup)
-                if s:
-                    has_changed = True
-                    data.append("Add HostGroup: %s" % add_hostgroup)
-                else:
-                    module.fail_json(msg='Unable to add hostgroup: %s, %s' % (add_hostgroup, h), changed=has_changed)
-
-            if del_hostgroup:
-                s, h = host.deletehostgroup(del_hostgroup)
-                if s:
-                    has_changed = True
-                    data.append("Del HostGroup: %s" % del_hostgroup)
-                else:
-                    module.fail_json(msg='Unable to delete hostgroup: %s, %s' % (del_hostgroup, h), changed=has_changed)
-
-    #### HostTemplates
-    if hosttemplates:
-        ht_state, ht_list = host.gettemplate()
-        if ht_state:
-            template_list = list()
-            if ht_list is not None:
-                for tpl in ht_list.keys():
-                    template_list.append(tpl)
-            del_host_template = list()
-            add_host_template = list()
-            for tmpl in hosttemplates:
-                if tmpl.get('name') in template_list and tmpl.get('state') == "absent":
-                    del_host_template.append(tmpl.get('name'))
-                elif tmpl.get('name') not in template_list \
-                        and (tmpl.get('state') == "present"
-                             or tmpl.get('state') is None):
-                    add_host_template.append(tmpl.get('name'))
-
-            if add_host_template:
-                s, h = host.addtemplate(add_host_template)
-                if s:
-                    host.applytemplate()
-                    has_changed = True
-                    data.append("Add HostTemplate: %s" % add_host_template)
-                else:
-                    module.fail_json(msg='Unable to add hostTemplate: %s' % add_host_template, changed=has_changed)
-
-            if del_host_template:
-                s, h = host.deletetemplate(del_host_template)
-                if s:
-                    host.applytemplate()
-                    has_changed = True
-                    data.append("Del HostTemplate: %s" % del_host_template)
-                else:
-                    module.fail_json(msg='Unable to del hostTemplate: %s' % del_host_template, changed=has_changed)
-
-    #### Contacts
-    if contacts:
         try:
-            has_changed = centreon_utils.update_contacts(host, contacts, data)
+            if centreon_utils.update_hostgroups(host, hostgroups, data):
+                has_changed = True
         except Exception as e:
-            module.fail_json(msg=f"Failed to update contacts: {str(e)}", changed=has_changed)
+            module.fail_json(msg=str(e), changed=has_changed)
             return
 
-    #### Contacts Groups
-    if contactgroups:
+    #### HostTemplates
+    if hosttemplates:
         try:
-            has_changed = centreon_utils.update_contactgroups(host, contactgroups, data)
+            if centreon_utils.update_hosttemplates(host, hosttemplates, data):
+                templates_changed = True
+                has_changed = True
         except Exception as e:
-            module.fail_json(msg=f"Failed to update contact groups: {str(e)}", changed=has_changed)
+            module.fail_json(msg=str(e), changed=has_changed)
             return
 
-    #### Macros
-    if macros:
+    # Create the services of the templates, once for the creation and all template changes
+    if templates_changed:
         try:
-            has_changed = centreon_utils.update_macros(host, macros, data)
+            centreon_utils.apply_template(host, data)
         except Exception as e:
-            module.fail_json(msg=f"Failed to update macros: {str(e)}", changed=has_changed)
+            module.fail_json(msg=str(e), changed=has_changed)
             return
 
-    #### Params
-    if params:
+    #### Contacts, Contacts Groups, Macros, Params
+    try:
+        if centreon_utils.run_reconcilers(host, [
+            ('contacts', centreon_utils.update_contacts, contacts),
+            ('contact groups', centreon_utils.update_contactgroups, contactgroups),
+            ('macros', centreon_utils.update_macros, macros),
+            ('params', centreon_utils.update_params, params),
+        ], data, max_workers=reconcile_workers):
+            has_changed = True
+    except centreon_utils.ReconcileError as e:
+        module.fail_json(msg=str(e), changed=has_changed or e.changed)
+        return
+
+    result = dict(changed=has_changed, msg=data)
+    applied = True
+    if has_changed:
+        if mirror:
+            mirror.record_host(host, instance, address=ipaddr, alias=alias,
+                               activate='1' if status == 'enabled' else '0')
+            mirror.record_host_relations(name, templates=hosttemplates, hostgroups=hostgroups)
+        applied, applied_msg = centreon_applycfg.applycfg(poller, applycfg, url, result, applycfg_debounce)
+        if not applied:
+            module.warn("Unable to apply configuration on poller %s: %s" % (instance, applied_msg))
+    # Only once the configuration is applied, or its apply deferred
+    if fingerprint and applied:
         try:
-            has_changed = centreon_utils.update_params(host, params, data)
+            fingerprint.record(url, 'HOST|%s' % name, spec,
+                               centreon_fingerprint.host_marker(centreon.hosts.webservice, name))
         except Exception as e:
-            module.fail_json(msg=f"Failed to update params: {str(e)}", changed=has_changed)
-            return
+            module.warn("Unable to record fingerprint of host %s: %s" % (name, e))
 
-    if applycfg and has_changed:
-        poller.applycfg()
-    module.exit_json(changed=has_changed, msg=data)
+    module.exit_json(**result)
 
 
 if __name__ == '__main__':
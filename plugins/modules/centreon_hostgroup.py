@@ -19,18 +19,6 @@ description: Manage Centreon hostgroups.
 short_description: Manage Centreon hostgroups
 
 options:
-  url:
-    description:
-      - Centreon URL
-    required: True
-  username:
-    description:
-      - Centreon API username
-    required: True
-  password:
-    description:
-      - Centreon API username's password
-    required: True
   hg:
     description:
       - Hostgroup name (/ alias)
@@ -39,11 +27,9 @@ options:
       - Create / Delete hostgroup
     default: present
     choices: ['present', 'absent']
-  validate_certs:
-    type: bool
-    default: yes
-    description:
-      - If C(no), SSL certificates will not be validated.
+extends_documentation_fragment:
+  - community.centreon.centreon
+  - community.centreon.centreon.mirror
 requirements:
   - Python Centreon API
 author:
@@ -76,9 +62,11 @@ EXAMPLES = '''
 # =============================================
 # Centreon module API Rest
 #
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_args, centreon_client, centreon_mirror, centreon_perf, centreon_profile
+)
 
 try:
-    from centreonapi.centreon import Centreon
     from centreonapi import __version__ as centreonapi_version
 except ImportError:
     centreonapi_found = False
@@ -86,16 +74,14 @@ else:
     centreonapi_found = True
 
 
+@centreon_profile.profiled('centreon_hostgroup')
 def main():
 
     module = AnsibleModule(
-        argument_spec=dict(
-            url=dict(required=True),
-            username=dict(default='admin', no_log=True),
-            password=dict(default='centreon', no_log=True),
+        argument_spec=centreon_args.argument_spec(
+            centreon_args.MIRROR,
             hg=dict(required=True, type='list'),
             state=dict(default='present', choices=['present', 'absent']),
-            validate_certs=dict(default=True, type='bool'),
 
         )
     )
@@ -103,25 +89,35 @@ def main():
     if not centreonapi_found or packaging.version.parse(centreonapi_version) < packaging.version.parse("0.2.0"):
         module.fail_json(msg="Python centreonapi >= 0.2.0 module is required")
 
+    tracer = centreon_perf.attach(module)
+
     url      = module.params["url"]
     username = module.params["username"]
     password = module.params["password"]
     name = module.params["hg"]
     state = module.params["state"]
+    mirror_path = module.params["mirror"]
+    mirror_max_age = module.params["mirror_max_age"]
     validate_certs = module.params["validate_certs"]
+    token_cache = module.params["token_cache"]
+    token_cache_ttl = module.params["token_cache_ttl"]
 
 
     has_changed = False
 
     try:
-        centreon = Centreon(url, username, password, check_ssl=validate_certs)
+        centreon = centreon_client.connect(url, username, password, check_ssl=validate_certs,
+                                           token_cache=token_cache, token_cache_ttl=token_cache_ttl,
+                                           socket_path=module._socket_path, tracer=tracer)
     except Exception as e:
         module.fail_json(
             msg="Unable to connect to Centreon API: %s" % e.message
         )
 
+    mirror = centreon_mirror.open_mirror(mirror_path, mirror_max_age, url)
+
     try:
-        hostgroups = centreon.hostgroups.list()
+        hostgroups = mirror.hostgroups() if mirror else centreon.hostgroups.list()
     except Exception as e:
         module.fail_json(msg="Unable to list hostgroups: {}".format(e.message))
 
@@ -131,6 +127,8 @@ def main():
                 s, h = centreon.hostgroups.delete(hg.get('name'))
                 if s:
                     has_changed = True
+                    if mirror:
+                        mirror.delete_hostgroup(hg.get('name'))
                 else:
                     module.fail_json(msg="Unable to delete hostgroup: %s" % h)
         if has_changed:
@@ -146,6 +144,8 @@ def main():
                 s, h = centreon.hostgroups.add(hg.get('name'), alias)
                 if s:
                     has_changed = True
+                    if mirror:
+                        mirror.set_hostgroup(dict(name=hg.get('name'), alias=alias))
                 else:
                     module.fail_json(msg="Unable to create hostgroup: %s" % h)
 
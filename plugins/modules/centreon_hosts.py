@@ -0,0 +1,244 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import packaging.version
+# import module snippets
+from ansible.module_utils.basic import AnsibleModule
+
+ANSIBLE_METADATA = {
+    'status': ['preview'],
+    'supported_by': 'community',
+    'metadata_version': '0.1',
+    'version': '0.1'
+}
+
+DOCUMENTATION = '''
+---
+module: centreon_hosts
+version_added: "2.9"
+description:
+  - Manage many Centreon hosts in a single task.
+  - Logs in once, lists existing hosts and pollers once, only applies the differences
+    and applies the configuration once per affected poller.
+short_description: Manage Centreon hosts in bulk
+
+options:
+  hosts:
+    description:
+      - List of hosts, each one accepting the options of M(community.centreon.centreon_host)
+        (name, alias, ipaddr, instance, hosttemplates, hostgroups, params, macros, contacts,
+        contactgroups, state, status).
+    type: list
+    required: True
+  applycfg:
+    description:
+      - Apply configuration on each poller owning a changed host, once at the end
+      - With C(deferred), only report the poller as dirty in C(deferred_applycfg) so that the
+        C(community.centreon.centreon_applycfg) callback applies it once at the end of the play.
+    default: True
+    choices: ['True', 'False', 'deferred']
+  applytemplate_workers:
+    type: int
+    default: 1
+    description:
+      - The templates of the created hosts and of the hosts whose templates changed are applied once
+        per host, after every host is converged. Number of hosts whose templates are applied at the
+        same time.
+  batch:
+    type: bool
+    default: no
+    description:
+      - Queue the changes and send them at the end as a single CLAPI import file (C(centreon -i))
+        instead of one API call each. Reads still go through the API.
+      - The module must run on the Centreon central server, for instance with C(delegate_to).
+  batch_command:
+    default: centreon
+    description:
+      - Path of the CLAPI command line on the Centreon central server. It is run with C(-u) and C(-i),
+        the password is written to its prompt rather than passed with C(-p).
+extends_documentation_fragment:
+  - community.centreon.centreon
+  - community.centreon.centreon.applycfg
+requirements:
+  - Python Centreon API
+author:
+    - Jérôme Martin
+'''
+
+EXAMPLES = '''
+- community.centreon.centreon_hosts:
+    url: "{{ centreon_url }}"
+    username: "{{ centreon_api_user }}"
+    password: "{{ centreon_api_pass }}"
+    hosts: "{{ groups['linux'] | map('extract', hostvars) | map(attribute='centreon_host') | list }}"
+  delegate_to: localhost
+  run_once: true
+
+- community.centreon.centreon_hosts:
+    url: "{{ centreon_url }}"
+    username: "{{ centreon_api_user }}"
+    password: "{{ centreon_api_pass }}"
+    hosts:
+      - name: web01
+        alias: web01.company.net
+        ipaddr: 10.0.0.11
+        hosttemplates:
+          - name: OS-Linux-SNMP-custom
+        hostgroups:
+          - name: Linux-Servers
+      - name: web02
+        state: absent
+'''
+
+# =============================================
+# Centreon module API Rest
+#
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_applycfg, centreon_args, centreon_batch, centreon_client, centreon_perf, centreon_profile, centreon_utils
+)
+
+try:
+    from centreonapi import __version__ as centreonapi_version
+except ImportError:
+    centreonapi_found = False
+else:
+    centreonapi_found = True
+
+
+@centreon_profile.profiled('centreon_hosts')
+def main():
+    module = AnsibleModule(
+        argument_spec=centreon_args.argument_spec(
+            centreon_args.APPLYCFG,
+            hosts=dict(type='list', required=True),
+            applycfg=dict(default=True, type='raw'),
+            applytemplate_workers=dict(default=1, type='int'),
+            batch=dict(default=False, type='bool'),
+            batch_command=dict(default='centreon'),
+        )
+    )
+
+    if not centreonapi_found or packaging.version.parse(centreonapi_version) < packaging.version.parse("0.2.0"):
+        module.fail_json(msg="Python centreonapi >= 0.2.0 module is required")
+
+    tracer = centreon_perf.attach(module)
+
+    try:
+        applycfg = centreon_applycfg.parse(module.params["applycfg"])
+    except TypeError as e:
+        module.fail_json(msg="Invalid applycfg: %s" % e)
+
+    url = module.params["url"]
+    username = module.params["username"]
+    password = module.params["password"]
+    hosts = module.params["hosts"]
+    applycfg_debounce = module.params["applycfg_debounce"]
+    applytemplate_workers = module.params["applytemplate_workers"]
+    batch_import = module.params["batch"]
+    batch_command = module.params["batch_command"]
+    validate_certs = module.params["validate_certs"]
+    token_cache = module.params["token_cache"]
+    token_cache_ttl = module.params["token_cache_ttl"]
+
+    has_changed = False
+
+    for spec in hosts:
+        if not isinstance(spec, dict) or not spec.get('name'):
+            module.fail_json(msg="Each host must be a dict with a name: %s" % spec)
+
+    try:
+        centreon = centreon_client.connect(url, username, password, check_ssl=validate_certs,
+                                           token_cache=token_cache, token_cache_ttl=token_cache_ttl,
+                                           socket_path=module._socket_path, tracer=tracer)
+    except Exception as e:
+        module.fail_json(msg="Unable to connect to Centreon API: %s" % str(e))
+        return
+
+    batch = None
+    if batch_import:
+        batch = centreon_batch.Batch()
+        centreon_batch.use_batch(centreon.hosts.webservice, batch)
+
+    try:
+        pollers = dict(centreon.pollers.list())
+        existing = dict(centreon.hosts.list())
+    except Exception as e:
+        module.fail_json(msg="Unable to list pollers and hosts: {}".format(e))
+        return
+
+    # Hosts to delete dirty the poller they are on, whatever their instance option
+    on_poller = dict()
+    if any(spec.get('state', "present") == "absent" and spec['name'] in existing for spec in hosts):
+        try:
+            on_poller = centreon_utils.host_pollers(centreon, pollers)
+        except Exception as e:
+            module.fail_json(msg="Unable to list the hosts of the pollers: {}".format(e))
+            return
+
+    results = list()
+    dirty_pollers = set()
+    to_apply = dict()
+
+    for spec in hosts:
+        instance = spec.get('instance') or 'Central'
+        if spec.get('state', "present") == "absent":
+            instance = on_poller.get(spec['name'], instance)
+        if instance not in pollers:
+            module.fail_json(msg="Poller '%s' does not exists" % instance, changed=has_changed, hosts=results)
+            return
+
+        data = list()
+        try:
+            with centreon_batch.labelled(batch, spec.get('name')):
+                host_changed = centreon_utils.reconcile_host(centreon, existing, spec, data, to_apply=to_apply)
+        except Exception as e:
+            module.fail_json(msg="Host %s: %s - %s" % (spec.get('name'), e, data), changed=has_changed,
+                             hosts=results)
+            return
+
+        results.append(dict(name=spec.get('name'), changed=host_changed, msg=data))
+        if host_changed:
+            has_changed = True
+            dirty_pollers.add(instance)
+
+    #### Templates of all the hosts, together
+    if batch is not None:
+        errors = dict()
+        for name, item in to_apply.items():
+            with batch.labelled(name):
+                errors.update(centreon_utils.apply_templates({name: item}))
+    else:
+        errors = centreon_utils.apply_templates(to_apply, max_workers=applytemplate_workers)
+    if errors:
+        for r in results:
+            if r['name'] in errors:
+                r['failed'] = True
+                r['msg'].append(errors[r['name']])
+        module.fail_json(msg="Unable to apply templates of %s" % sorted(errors), changed=has_changed, hosts=results)
+        return
+
+    if batch is not None:
+        try:
+            failed = centreon_batch.failed_labels(
+                batch.flush(centreon_batch.ImportSender(username, password, batch_command)))
+        except Exception as e:
+            module.fail_json(msg="Unable to import the CLAPI batch: %s" % e, changed=has_changed, hosts=results)
+            return
+        if centreon_batch.report(results, failed, lambda r: r['name']):
+            module.fail_json(msg="CLAPI import failed for %d objects" % len(failed), changed=has_changed,
+                             hosts=results)
+            return
+
+    result = dict(changed=has_changed, hosts=results, pollers=sorted(dirty_pollers))
+    for instance in sorted(dirty_pollers):
+        s, m = centreon_applycfg.applycfg(pollers[instance], applycfg, url, result, applycfg_debounce)
+        if not s:
+            module.fail_json(msg="Unable to apply configuration on poller %s: %s" % (instance, m),
+                             changed=has_changed, hosts=results)
+            return
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
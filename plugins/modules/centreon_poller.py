@@ -20,18 +20,6 @@ description: Deploy configuration to a Centreon poller.
 short_description: Deploy configuration to a Centreon poller
 
 options:
-  url:
-    description:
-      - Centreon URL
-    required: True
-  username:
-    description:
-      - Centreon API username
-    required: True
-  password:
-    description:
-      - Centreon API username's password
-    required: True
   instance:
     description:
       - Poller instance to check host
@@ -41,11 +29,9 @@ options:
       - action for poller
     default: applycfg
     choices: ['applycfg']
-  validate_certs:
-    type: bool
-    default: yes
-    description:
-      - If C(no), SSL certificates will not be validated.
+extends_documentation_fragment:
+  - community.centreon.centreon
+  - community.centreon.centreon.applycfg
 requirements:
   - Python Centreon API
 author:
@@ -65,10 +51,12 @@ EXAMPLES = '''
 # =============================================
 # Centreon module API Rest
 #
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_applycfg, centreon_args, centreon_client, centreon_perf, centreon_profile
+)
 
 
 try:
-    from centreonapi.centreon import Centreon
     from centreonapi import __version__ as centreonapi_version
 except ImportError:
     centreonapi_found = False
@@ -76,33 +64,38 @@ else:
     centreonapi_found = True
 
 
+@centreon_profile.profiled('centreon_poller')
 def main():
 
     module = AnsibleModule(
-        argument_spec=dict(
-            url=dict(required=True),
-            username=dict(default='admin', no_log=True),
-            password=dict(default='centreon', no_log=True),
+        argument_spec=centreon_args.argument_spec(
+            centreon_args.APPLYCFG,
             instance=dict(default='Central'),
             action=dict(default='applycfg', choices=['applycfg']),
-            validate_certs=dict(default=True, type='bool'),
         )
     )
 
     if not centreonapi_found or packaging.version.parse(centreonapi_version) < packaging.version.parse("0.2.0"):
         module.fail_json(msg="Python centreonapi >= 0.2.0 module is required")
 
+    tracer = centreon_perf.attach(module)
+
     url = module.params["url"]
     username = module.params["username"]
     password = module.params["password"]
     instance = module.params["instance"]
     action = module.params["action"]
+    applycfg_debounce = module.params["applycfg_debounce"]
     validate_certs = module.params["validate_certs"]
+    token_cache = module.params["token_cache"]
+    token_cache_ttl = module.params["token_cache_ttl"]
 
     has_changed = False
 
     try:
-        centreon = Centreon(url, username, password, check_ssl=validate_certs)
+        centreon = centreon_client.connect(url, username, password, check_ssl=validate_certs,
+                                           token_cache=token_cache, token_cache_ttl=token_cache_ttl,
+                                           socket_path=module._socket_path, tracer=tracer)
     except Exception as exc:
         module.fail_json(
             msg="Unable to connect to Centreon API: %s" % str(exc)
@@ -121,10 +114,12 @@ def main():
         module.fail_json(msg="Unable to get poller list %s " % poller)
 
     if action == "applycfg":
-        s, p = poller.applycfg()
+        s, p, run = centreon_applycfg.shared_applycfg(poller, url, applycfg_debounce)
         if s:
             has_changed = True
-            module.exit_json(msg="Applied config on poller", changed=has_changed)
+            applied = dict(server=centreon_applycfg.server_key(url), url=url, pollers=[instance])
+            module.exit_json(msg="Applied config on poller", changed=has_changed,
+                             **{centreon_applycfg.APPLIED_KEY: applied, centreon_applycfg.RUN_KEY: [run]})
         else:
             module.fail_json(msg=p)
 
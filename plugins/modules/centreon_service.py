@@ -16,32 +16,43 @@ description: Manage Centreon services.
 short_description: Manage Centreon services
 
 options:
-  url:
-    description:
-      - Centreon URL
-    required: True
-  username:
-    description:
-      - Centreon API username
-    required: True
-  password:
-    description:
-      - Centreon API username's password
-    required: True
   instance:
     description:
       - Poller instance
     default: Central
+  skip_inherited_macros:
+    type: bool
+    default: no
+    description:
+      - Do not set the macros the service already inherits at the same value from its service template
+        and the parents of that template.
+        The inheritance chain is resolved once from the list of templates.
   applycfg:
     description:
       - Apply configuration on poller
+      - With C(deferred), only report the poller as dirty in C(deferred_applycfg) so that the
+        C(community.centreon.centreon_applycfg) callback applies it once at the end of the play.
     default: True
-    choices: ['True','False']
-  validate_certs:
-    type: bool
-    default: yes
+    choices: ['True', 'False', 'deferred']
+  reconcile_workers:
+    type: int
+    default: 1
+    description:
+      - Number of threads used to update contacts, contact groups, macros and params at the same time.
+        They touch disjoint parts of the object, the default updates them one after another.
+  fingerprint:
+    type: path
     description:
-      - If C(no), SSL certificates will not be validated.
+      - Path of a state file recording, for each service, a hash of the options and of its Centreon
+        C(show) row after the last run. When both are unchanged, the module returns at once after that
+        single read, without reading or converging the rest of the service.
+      - Changes made outside of Ansible to templates, macros, params or relations do not change the
+        C(show) row, they are only seen once the entry is older than C(fingerprint_max_age).
+  fingerprint_max_age:
+    type: int
+    default: 86400
+    description:
+      - Seconds after which an entry of the fingerprint file is no longer trusted.
   name:
     description:
       - Service name
@@ -73,6 +84,11 @@ options:
       - Enable/disable service
     default: enabled
     choices: ['enabled', 'disabled']
+extends_documentation_fragment:
+  - community.centreon.centreon
+  - community.centreon.centreon.applycfg
+  - community.centreon.centreon.mirror
+  - community.centreon.centreon.object_cache
 requirements:
   - Python Centreon API
 author:
@@ -105,10 +121,12 @@ EXAMPLES = '''
 from ansible.module_utils.basic import AnsibleModule
 
 # import module snippets
-from ansible_collections.community.centreon.plugins.module_utils import centreon_utils
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_applycfg, centreon_args, centreon_client, centreon_fingerprint, centreon_mirror, centreon_perf,
+    centreon_profile, centreon_templates, centreon_utils
+)
 
 try:
-    from centreonapi.centreon import Centreon
     from centreonapi import __version__ as centreonapi_version
 except ImportError:
     centreonapi_found = False
@@ -116,12 +134,11 @@ else:
     centreonapi_found = True
 
 
+@centreon_profile.profiled('centreon_service')
 def main():
     module = AnsibleModule(
-        argument_spec=dict(
-            url=dict(required=True),
-            username=dict(default='admin', no_log=True),
-            password=dict(default='centreon', no_log=True),
+        argument_spec=centreon_args.argument_spec(
+            centreon_args.APPLYCFG, centreon_args.MIRROR, centreon_args.OBJECT_CACHE,
             name=dict(required=True),
             host=dict(required=True),
             servicetemplate=dict(required=True),
@@ -132,14 +149,24 @@ def main():
             instance=dict(default='Central'),
             state=dict(default='present', choices=['present', 'absent']),
             status=dict(default='enabled', choices=['enabled', 'disabled']),
-            applycfg=dict(default=True, type='bool'),
-            validate_certs=dict(default=True, type='bool'),
+            skip_inherited_macros=dict(default=False, type='bool'),
+            applycfg=dict(default=True, type='raw'),
+            reconcile_workers=dict(default=1, type='int'),
+            fingerprint=dict(default=None, type='path'),
+            fingerprint_max_age=dict(default=86400, type='int'),
         )
     )
 
     if not centreonapi_found or packaging.version.parse(centreonapi_version) < packaging.version.parse("0.2.0"):
         module.fail_json(msg="Python centreonapi >= 0.2.0 module is required")
 
+    tracer = centreon_perf.attach(module)
+
+    try:
+        applycfg = centreon_applycfg.parse(module.params["applycfg"])
+    except TypeError as e:
+        module.fail_json(msg="Invalid applycfg: %s" % e)
+
     url = module.params["url"]
     username = module.params["username"]
     password = module.params["password"]
@@ -153,19 +180,45 @@ def main():
     instance = module.params["instance"]
     state = module.params["state"]
     status = module.params["status"]
-    applycfg = module.params["applycfg"]
+    skip_inherited_macros = module.params["skip_inherited_macros"]
+    applycfg_debounce = module.params["applycfg_debounce"]
+    reconcile_workers = module.params["reconcile_workers"]
+    mirror_path = module.params["mirror"]
+    mirror_max_age = module.params["mirror_max_age"]
+    fingerprint_path = module.params["fingerprint"]
+    fingerprint_max_age = module.params["fingerprint_max_age"]
     validate_certs = module.params["validate_certs"]
+    token_cache = module.params["token_cache"]
+    token_cache_ttl = module.params["token_cache_ttl"]
+    object_cache = module.params["object_cache"]
 
     has_changed = False
 
     try:
-        centreon = Centreon(url, username, password, check_ssl=validate_certs)
+        centreon = centreon_client.connect(url, username, password, check_ssl=validate_certs,
+                                           token_cache=token_cache, token_cache_ttl=token_cache_ttl,
+                                           socket_path=module._socket_path, object_cache=object_cache, tracer=tracer)
     except Exception as e:
         module.fail_json(msg="Unable to connect to Centreon API: %s" % str(e))
         return
 
+    #### Fingerprint
+    fingerprint = None
+    if fingerprint_path:
+        fingerprint = centreon_fingerprint.FingerprintFile(fingerprint_path, fingerprint_max_age)
+        spec = centreon_fingerprint.spec_hash(module.params)
+        try:
+            marker = centreon_fingerprint.service_marker(centreon.services.webservice, host, name)
+            if fingerprint.unchanged(url, 'SERVICE|%s|%s' % (host, name), spec, marker):
+                module.exit_json(changed=False, msg=[f"Service {name} on {host} unchanged since the last run"])
+        except Exception as e:
+            module.fail_json(msg=f"Unable to check fingerprint of service {name} on {host}: {e}")
+            return
+
+    mirror = centreon_mirror.open_mirror(mirror_path, mirror_max_age, url)
+
     try:
-        st, poller = centreon.pollers.get(instance)
+        st, poller = mirror.get_poller(instance) if mirror else centreon.pollers.get(instance)
     except Exception as e:
         module.fail_json(msg="Unable to get pollers: {}".format(e))
         return
@@ -176,7 +229,10 @@ def main():
         module.fail_json(msg="Unable to get poller list %s " % poller)
 
     data = []
-    service_state, service = centreon.services.get(host, name)
+    if mirror:
+        service_state, service = mirror.get_service(host, name)
+    else:
+        service_state, service = centreon.services.get(host, name)
 
     if not service_state and state == "present":
         try:
@@ -190,6 +246,8 @@ def main():
             service_state, service = centreon.services.get(host, name)
             has_changed = True
             data.append(f"Added service: {name} on {host}")
+            if mirror and service_state:
+                mirror.record_service(host, name, service)
         except Exception as e:
             module.fail_json(msg='Create: %s - %s' % (e, data), changed=has_changed)
             return
@@ -202,9 +260,15 @@ def main():
         del_state, del_res = centreon.services.delete(name, host)
         if del_state:
             has_changed = True
-            if applycfg:
-                poller.applycfg()
-            module.exit_json(changed=has_changed, result=f"Service {name} for host {host} deleted")
+            if mirror:
+                mirror.delete_service(host, name)
+            result = dict(changed=has_changed, result=f"Service {name} for host {host} deleted")
+            applied, applied_msg = centreon_applycfg.applycfg(poller, applycfg, url, result, applycfg_debounce)
+            if not applied:
+                module.warn(f"Unable to apply configuration on poller {instance}: {applied_msg}")
+            elif fingerprint:
+                fingerprint.record(url, 'SERVICE|%s|%s' % (host, name), spec, None)
+            module.exit_json(**result)
         else:
             module.fail_json(msg='State: %s' % del_res, changed=has_changed)
 
@@ -224,41 +288,50 @@ def main():
         else:
             module.fail_json(msg=f'Unable to enable service {name} for host {host}: {e_state}', changed=has_changed)
 
-    #### Macros
-    if macros:
+    #### Inherited macros
+    inherited = None
+    if skip_inherited_macros and macros:
         try:
-            has_changed = centreon_utils.update_macros(service, macros, data)
+            resolver = centreon_templates.TemplateResolver(centreon.services.webservice)
+            inherited = resolver.service_macros(servicetemplate)
         except Exception as e:
-            module.fail_json(msg=f"Failed to update macros: {str(e)}", changed=has_changed)
+            module.fail_json(msg=f"Unable to resolve macros of template {servicetemplate}: {e}", changed=has_changed)
             return
 
-    #### Params
-    if params:
-        try:
-            has_changed = centreon_utils.update_params(service, params, data)
-        except Exception as e:
-            module.fail_json(msg=f"Failed to update params: {str(e)}", changed=has_changed)
-            return
+    def update_service_macros(obj, items, d):
+        return centreon_utils.update_macros(obj, items, d, inherited)
 
-    #### Contacts
-    if contacts:
-        try:
-            has_changed = centreon_utils.update_contacts(host, contacts, data)
-        except Exception as e:
-            module.fail_json(msg=f"Failed to update contacts: {str(e)}", changed=has_changed)
-            return
+    #### Contacts, Contacts Groups, Macros, Params
+    try:
+        if centreon_utils.run_reconcilers(service, [
+            ('macros', update_service_macros, macros),
+            ('params', centreon_utils.update_params, params),
+            ('contacts', centreon_utils.update_contacts, contacts),
+            ('contact groups', centreon_utils.update_contactgroups, contactgroups),
+        ], data, max_workers=reconcile_workers):
+            has_changed = True
+    except centreon_utils.ReconcileError as e:
+        module.fail_json(msg=str(e), changed=has_changed or e.changed)
+        return
 
-    #### Contacts Groups
-    if contactgroups:
+    result = dict(changed=has_changed, msg=data)
+    applied = True
+    if has_changed:
+        if mirror:
+            mirror.set_service({'host name': host, 'description': name, 'id': service.id,
+                                'activate': '1' if status == 'enabled' else '0'})
+        applied, applied_msg = centreon_applycfg.applycfg(poller, applycfg, url, result, applycfg_debounce)
+        if not applied:
+            module.warn(f"Unable to apply configuration on poller {instance}: {applied_msg}")
+    # Only once the configuration is applied, or its apply deferred
+    if fingerprint and applied:
         try:
-            has_changed = centreon_utils.update_contactgroups(service, contactgroups, data)
+            fingerprint.record(url, 'SERVICE|%s|%s' % (host, name), spec,
+                               centreon_fingerprint.service_marker(centreon.services.webservice, host, name))
         except Exception as e:
-            module.fail_json(msg=f"Failed to update contact groupss: {str(e)}", changed=has_changed)
-            return
+            module.warn(f"Unable to record fingerprint of service {name} on {host}: {e}")
 
-    if applycfg and has_changed:
-        poller.applycfg()
-    module.exit_json(changed=has_changed, msg=data)
+    module.exit_json(**result)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,221 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import packaging.version
+# import module snippets
+from ansible.module_utils.basic import AnsibleModule
+
+ANSIBLE_METADATA = {
+    'status': ['preview'],
+    'supported_by': 'community',
+    'metadata_version': '0.1',
+    'version': '0.1'
+}
+
+DOCUMENTATION = '''
+---
+module: centreon_services
+version_added: "2.9"
+description:
+  - Manage many Centreon services in a single task.
+  - Logs in once, fetches the service list of each concerned host once, only applies the
+    differences and applies the configuration once per affected poller.
+  - Without C(batch), each difference is still one API call, CLAPI having no call that sets several
+    services, macros or params at once. Unlike M(community.centreon.centreon_hosts) and its templates,
+    there is no step to group across services. Use C(batch) to send all the changes at once.
+short_description: Manage Centreon services in bulk
+
+options:
+  services:
+    description:
+      - List of services, each one accepting the options of M(community.centreon.centreon_service)
+        (host, name, servicetemplate, instance, params, macros, contacts, contactgroups, state, status).
+    type: list
+    required: True
+  applycfg:
+    description:
+      - Apply configuration on each poller owning a changed service, once at the end
+      - With C(deferred), only report the poller as dirty in C(deferred_applycfg) so that the
+        C(community.centreon.centreon_applycfg) callback applies it once at the end of the play.
+    default: True
+    choices: ['True', 'False', 'deferred']
+  batch:
+    type: bool
+    default: no
+    description:
+      - Queue the changes and send them at the end as a single CLAPI import file (C(centreon -i))
+        instead of one API call each. Reads still go through the API.
+      - The module must run on the Centreon central server, for instance with C(delegate_to).
+  batch_command:
+    default: centreon
+    description:
+      - Path of the CLAPI command line on the Centreon central server. It is run with C(-u) and C(-i),
+        the password is written to its prompt rather than passed with C(-p).
+extends_documentation_fragment:
+  - community.centreon.centreon
+  - community.centreon.centreon.applycfg
+requirements:
+  - Python Centreon API
+author:
+    - Jérôme Martin
+'''
+
+EXAMPLES = '''
+- community.centreon.centreon_services:
+    url: "{{ centreon_url }}"
+    username: "{{ centreon_api_user }}"
+    password: "{{ centreon_api_pass }}"
+    services:
+      - host: web01
+        name: Disk
+        servicetemplate: OS-Linux-Disks-NRPE3
+        macros:
+          - name: FILTERMOUNTPOINT
+            value: "/"
+      - host: web01
+        name: Ping
+        servicetemplate: Base-Ping-LAN
+        params:
+          - name: notes
+            value: "ICMP"
+      - host: web02
+        name: Disk
+        state: absent
+  delegate_to: localhost
+  run_once: true
+'''
+
+# =============================================
+# Centreon module API Rest
+#
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_applycfg, centreon_args, centreon_batch, centreon_client, centreon_perf, centreon_profile, centreon_utils
+)
+
+try:
+    from centreonapi import __version__ as centreonapi_version
+except ImportError:
+    centreonapi_found = False
+else:
+    centreonapi_found = True
+
+
+@centreon_profile.profiled('centreon_services')
+def main():
+    module = AnsibleModule(
+        argument_spec=centreon_args.argument_spec(
+            centreon_args.APPLYCFG,
+            services=dict(type='list', required=True),
+            applycfg=dict(default=True, type='raw'),
+            batch=dict(default=False, type='bool'),
+            batch_command=dict(default='centreon'),
+        )
+    )
+
+    if not centreonapi_found or packaging.version.parse(centreonapi_version) < packaging.version.parse("0.2.0"):
+        module.fail_json(msg="Python centreonapi >= 0.2.0 module is required")
+
+    tracer = centreon_perf.attach(module)
+
+    try:
+        applycfg = centreon_applycfg.parse(module.params["applycfg"])
+    except TypeError as e:
+        module.fail_json(msg="Invalid applycfg: %s" % e)
+
+    url = module.params["url"]
+    username = module.params["username"]
+    password = module.params["password"]
+    services = module.params["services"]
+    applycfg_debounce = module.params["applycfg_debounce"]
+    batch_import = module.params["batch"]
+    batch_command = module.params["batch_command"]
+    validate_certs = module.params["validate_certs"]
+    token_cache = module.params["token_cache"]
+    token_cache_ttl = module.params["token_cache_ttl"]
+
+    has_changed = False
+
+    # Group the services per host, keeping the order in which hosts first appear
+    by_host = dict()
+    for spec in services:
+        if not isinstance(spec, dict) or not spec.get('host') or not spec.get('name'):
+            module.fail_json(msg="Each service must be a dict with a host and a name: %s" % spec)
+        if spec.get('state', "present") == "present" and not spec.get('servicetemplate'):
+            module.fail_json(msg="Service %s on %s requires a servicetemplate" % (spec.get('name'), spec.get('host')))
+        by_host.setdefault(spec['host'], []).append(spec)
+
+    try:
+        centreon = centreon_client.connect(url, username, password, check_ssl=validate_certs,
+                                           token_cache=token_cache, token_cache_ttl=token_cache_ttl,
+                                           socket_path=module._socket_path, tracer=tracer)
+    except Exception as e:
+        module.fail_json(msg="Unable to connect to Centreon API: %s" % str(e))
+        return
+
+    batch = None
+    if batch_import:
+        batch = centreon_batch.Batch()
+        centreon_batch.use_batch(centreon.hosts.webservice, batch)
+
+    try:
+        pollers = dict(centreon.pollers.list())
+    except Exception as e:
+        module.fail_json(msg="Unable to get pollers: {}".format(e))
+        return
+
+    results = list()
+    dirty_pollers = set()
+
+    for host, specs in by_host.items():
+        try:
+            index = centreon_utils.list_host_services(centreon, host)
+        except Exception as e:
+            module.fail_json(msg=str(e), changed=has_changed, services=results)
+            return
+
+        for spec in specs:
+            instance = spec.get('instance') or 'Central'
+            if instance not in pollers:
+                module.fail_json(msg="Poller '%s' does not exists" % instance, changed=has_changed,
+                                 services=results)
+                return
+
+            data = list()
+            try:
+                with centreon_batch.labelled(batch, (host, spec.get('name'))):
+                    service_changed = centreon_utils.reconcile_service(centreon, index, spec, data)
+            except Exception as e:
+                module.fail_json(msg="Service %s on %s: %s - %s" % (spec.get('name'), host, e, data),
+                                 changed=has_changed, services=results)
+                return
+
+            results.append(dict(host=host, name=spec.get('name'), changed=service_changed, msg=data))
+            if service_changed:
+                has_changed = True
+                dirty_pollers.add(instance)
+
+    if batch is not None:
+        try:
+            failed = centreon_batch.failed_labels(
+                batch.flush(centreon_batch.ImportSender(username, password, batch_command)))
+        except Exception as e:
+            module.fail_json(msg="Unable to import the CLAPI batch: %s" % e, changed=has_changed, services=results)
+            return
+        if centreon_batch.report(results, failed, lambda r: (r['host'], r['name'])):
+            module.fail_json(msg="CLAPI import failed for %d objects" % len(failed), changed=has_changed,
+                             services=results)
+            return
+
+    result = dict(changed=has_changed, services=results, pollers=sorted(dirty_pollers))
+    for instance in sorted(dirty_pollers):
+        s, m = centreon_applycfg.applycfg(pollers[instance], applycfg, url, result, applycfg_debounce)
+        if not s:
+            module.fail_json(msg="Unable to apply configuration on poller %s: %s" % (instance, m),
+                             changed=has_changed, services=results)
+            return
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,32 +16,24 @@ description: Manage Centreon service templates.
 short_description: Manage Centreon service templates
 
 options:
-  url:
-    description:
-      - Centreon URL
-    required: True
-  username:
-    description:
-      - Centreon API username
-    required: True
-  password:
-    description:
-      - Centreon API username's password
-    required: True
   instance:
     description:
       - Poller instance
     default: Central
+  skip_inherited_macros:
+    type: bool
+    default: no
+    description:
+      - Do not set the macros the service template already inherits at the same value from its parent
+        template and the parents of that template.
+        The inheritance chain is resolved once from the list of templates.
   applycfg:
     description:
       - Apply configuration on poller
+      - With C(deferred), only report the poller as dirty in C(deferred_applycfg) so that the
+        C(community.centreon.centreon_applycfg) callback applies it once at the end of the play.
     default: True
-    choices: ['True','False']
-  validate_certs:
-    type: bool
-    default: yes
-    description:
-      - If C(no), SSL certificates will not be validated.
+    choices: ['True', 'False', 'deferred']
   name:
     description:
       - Service name
@@ -68,6 +60,10 @@ options:
       - Enable/disable service
     default: enabled
     choices: ['enabled', 'disabled']
+extends_documentation_fragment:
+  - community.centreon.centreon
+  - community.centreon.centreon.applycfg
+  - community.centreon.centreon.object_cache
 requirements:
   - Python Centreon API
 author:
@@ -98,10 +94,12 @@ EXAMPLES = '''
 from ansible.module_utils.basic import AnsibleModule
 
 # import module snippets
-from ansible_collections.community.centreon.plugins.module_utils import centreon_utils
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_applycfg, centreon_args, centreon_client, centreon_perf, centreon_profile, centreon_templates,
+    centreon_utils
+)
 
 try:
-    from centreonapi.centreon import Centreon
     from centreonapi import __version__ as centreonapi_version
 except ImportError:
     centreonapi_found = False
@@ -109,12 +107,11 @@ else:
     centreonapi_found = True
 
 
+@centreon_profile.profiled('centreon_servicetemplate')
 def main():
     module = AnsibleModule(
-        argument_spec=dict(
-            url=dict(required=True),
-            username=dict(default='admin', no_log=True),
-            password=dict(default='centreon', no_log=True),
+        argument_spec=centreon_args.argument_spec(
+            centreon_args.APPLYCFG, centreon_args.OBJECT_CACHE,
             name=dict(required=True),
             alias=dict(required=False),
             template=dict(required=False),
@@ -125,14 +122,21 @@ def main():
             instance=dict(default='Central'),
             state=dict(default='present', choices=['present', 'absent']),
             status=dict(default='enabled', choices=['enabled', 'disabled']),
-            applycfg=dict(default=True, type='bool'),
-            validate_certs=dict(default=True, type='bool'),
+            skip_inherited_macros=dict(default=False, type='bool'),
+            applycfg=dict(default=True, type='raw'),
         )
     )
 
     if not centreonapi_found or packaging.version.parse(centreonapi_version) < packaging.version.parse("0.2.0"):
         module.fail_json(msg="Python centreonapi >= 0.2.0 module is required")
 
+    tracer = centreon_perf.attach(module)
+
+    try:
+        applycfg = centreon_applycfg.parse(module.params["applycfg"])
+    except TypeError as e:
+        module.fail_json(msg="Invalid applycfg: %s" % e)
+
     url = module.params["url"]
     username = module.params["username"]
     password = module.params["password"]
@@ -146,13 +150,19 @@ def main():
     instance = module.params["instance"]
     state = module.params["state"]
     status = module.params["status"]
-    applycfg = module.params["applycfg"]
+    skip_inherited_macros = module.params["skip_inherited_macros"]
+    applycfg_debounce = module.params["applycfg_debounce"]
     validate_certs = module.params["validate_certs"]
+    token_cache = module.params["token_cache"]
+    token_cache_ttl = module.params["token_cache_ttl"]
+    object_cache = module.params["object_cache"]
 
     has_changed = False
 
     try:
-        centreon = Centreon(url, username, password, check_ssl=validate_certs)
+        centreon = centreon_client.connect(url, username, password, check_ssl=validate_certs,
+                                           token_cache=token_cache, token_cache_ttl=token_cache_ttl,
+                                           socket_path=module._socket_path, object_cache=object_cache, tracer=tracer)
     except Exception as e:
         module.fail_json(msg="Unable to connect to Centreon API: %s" % str(e))
         return
@@ -195,9 +205,11 @@ def main():
         del_state, del_res = centreon.servicetemplates.delete(name)
         if del_state:
             has_changed = True
-            if applycfg:
-                poller.applycfg()
-            module.exit_json(changed=has_changed, result=f"Service {name} deleted")
+            result = dict(changed=has_changed, result=f"Service {name} deleted")
+            applied, applied_msg = centreon_applycfg.applycfg(poller, applycfg, url, result, applycfg_debounce)
+            if not applied:
+                module.warn(f"Unable to apply configuration on poller {instance}: {applied_msg}")
+            module.exit_json(**result)
         else:
             module.fail_json(msg='State: %s' % del_res, changed=has_changed)
 
@@ -236,7 +248,11 @@ def main():
     #### Macros
     if macros:
         try:
-            has_changed = centreon_utils.update_macros(service, macros, data)
+            inherited = None
+            if skip_inherited_macros and template:
+                resolver = centreon_templates.TemplateResolver(centreon.servicetemplates.webservice)
+                inherited = resolver.service_macros(template)
+            has_changed = centreon_utils.update_macros(service, macros, data, inherited)
         except Exception as e:
             module.fail_json(msg=f"Failed to update macros: {str(e)}", changed=has_changed)
             return
@@ -249,9 +265,12 @@ def main():
             module.fail_json(msg=f"Failed to update params: {str(e)}", changed=has_changed)
             return
 
-    if applycfg and has_changed:
-        poller.applycfg()
-    module.exit_json(changed=has_changed, msg=data)
+    result = dict(changed=has_changed, msg=data)
+    if has_changed:
+        applied, applied_msg = centreon_applycfg.applycfg(poller, applycfg, url, result, applycfg_debounce)
+        if not applied:
+            module.warn(f"Unable to apply configuration on poller {instance}: {applied_msg}")
+    module.exit_json(**result)
 
 
 if __name__ == '__main__':
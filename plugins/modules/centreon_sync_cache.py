@@ -0,0 +1,127 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import packaging.version
+# import module snippets
+from ansible.module_utils.basic import AnsibleModule
+
+ANSIBLE_METADATA = {
+    'status': ['preview'],
+    'supported_by': 'community',
+    'metadata_version': '0.1',
+    'version': '0.1'
+}
+
+DOCUMENTATION = '''
+---
+module: centreon_sync_cache
+version_added: "2.9"
+description:
+  - Mirror the Centreon configuration (pollers, hosts, host templates, hostgroups, services,
+    service templates, commands) into a local SQLite file.
+  - The other modules read existence and current values from this file instead of the API
+    when given its path with C(mirror), as long as it is younger than their C(mirror_max_age).
+short_description: Mirror Centreon configuration into a local SQLite file
+
+options:
+  path:
+    description:
+      - Path of the SQLite file
+    type: path
+    required: True
+  host_relations:
+    description:
+      - Also mirror the templates of each host.
+      - This costs one more API call per host, so a synchronization of a large estate makes as many
+        round trips as there are hosts. The other tables take one call per object type, poller and
+        hostgroup.
+    type: bool
+    default: False
+extends_documentation_fragment:
+  - community.centreon.centreon
+requirements:
+  - Python Centreon API
+author:
+    - Jérôme Martin
+'''
+
+EXAMPLES = '''
+- community.centreon.centreon_sync_cache:
+    url: "{{ centreon_url }}"
+    username: "{{ centreon_api_user }}"
+    password: "{{ centreon_api_pass }}"
+    path: /var/cache/ansible/centreon.sqlite
+  delegate_to: localhost
+  run_once: true
+
+- community.centreon.centreon_host:
+    url: "{{ centreon_url }}"
+    username: "{{ centreon_api_user }}"
+    password: "{{ centreon_api_pass }}"
+    name: "{{ ansible_fqdn }}"
+    mirror: /var/cache/ansible/centreon.sqlite
+    mirror_max_age: 600
+  delegate_to: localhost
+'''
+
+# =============================================
+# Centreon module API Rest
+#
+from ansible_collections.community.centreon.plugins.module_utils import (
+    centreon_args, centreon_client, centreon_mirror, centreon_perf, centreon_profile
+)
+
+try:
+    from centreonapi import __version__ as centreonapi_version
+except ImportError:
+    centreonapi_found = False
+else:
+    centreonapi_found = True
+
+
+@centreon_profile.profiled('centreon_sync_cache')
+def main():
+    module = AnsibleModule(
+        argument_spec=centreon_args.argument_spec(
+            path=dict(required=True, type='path'),
+            host_relations=dict(default=False, type='bool'),
+        )
+    )
+
+    if not centreonapi_found or packaging.version.parse(centreonapi_version) < packaging.version.parse("0.2.0"):
+        module.fail_json(msg="Python centreonapi >= 0.2.0 module is required")
+
+    tracer = centreon_perf.attach(module)
+
+    url = module.params["url"]
+    username = module.params["username"]
+    password = module.params["password"]
+    path = module.params["path"]
+    host_relations = module.params["host_relations"]
+    validate_certs = module.params["validate_certs"]
+    token_cache = module.params["token_cache"]
+    token_cache_ttl = module.params["token_cache_ttl"]
+
+    try:
+        centreon = centreon_client.connect(url, username, password, check_ssl=validate_certs,
+                                           token_cache=token_cache, token_cache_ttl=token_cache_ttl,
+                                           socket_path=module._socket_path, tracer=tracer)
+    except Exception as e:
+        module.fail_json(msg="Unable to connect to Centreon API: %s" % str(e))
+        return
+
+    try:
+        mirror = centreon_mirror.CentreonMirror(path)
+        before = mirror.rows_digest()
+        counts = mirror.sync(centreon.hosts.webservice, host_relations=host_relations)
+        changed = mirror.rows_digest() != before
+        mirror.close()
+    except Exception as e:
+        module.fail_json(msg="Unable to synchronize %s: %s" % (path, e))
+        return
+
+    module.exit_json(changed=changed, path=path, counts=counts)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import contextlib
+import importlib
+import io
+import json
+import traceback
+
+from ansible.module_utils import basic
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils.common import warnings
+from ansible.plugins.action import ActionBase
+
+from ansible_collections.community.centreon.plugins.module_utils import centreon_client
+
+MODULES_PACKAGE = 'ansible_collections.community.centreon.plugins.modules.'
+
+
+def clear_warnings():
+    """
+    Empty the process-wide warnings and deprecations of the modules, which
+    AnsiballZ drops with its process.
+    """
+    del warnings._global_warnings[:]
+    del warnings._global_deprecations[:]
+
+
+def run_module(name, args, check_mode=False, diff=False, no_log=False):
+    """
+    Run the main() of a collection module inside the current process and
+    return its result, as AnsiballZ would have returned it.
+    """
+    module = importlib.import_module(MODULES_PACKAGE + name)
+    module_args = dict(args, _ansible_check_mode=check_mode, _ansible_diff=diff, _ansible_no_log=no_log)
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps(dict(ANSIBLE_MODULE_ARGS=module_args)))
+    centreon_client.REUSE_CLIENTS = True
+    clear_warnings()
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            module.main()
+    except SystemExit:
+        pass
+    except Exception as e:
+        return dict(failed=True, msg="Module %s failed: %s" % (name, e), exception=traceback.format_exc())
+    finally:
+        basic._ANSIBLE_ARGS = None
+        clear_warnings()
+
+    try:
+        return json.loads(output.getvalue())
+    except ValueError:
+        return dict(failed=True, msg="Module %s returned no valid result" % name, module_stdout=output.getvalue())
+
+
+class CentreonActionModule(ActionBase):
+    """
+    Run the Centreon modules inside the controller process when the task runs
+    locally, reusing one authenticated client per (url, username) for the
+    loop items of the task. Ansible forks a worker per task, so only the
+    token cache (token_cache) carries the login over to the next tasks.
+    """
+
+    def run(self, tmp=None, task_vars=None):
+        self._supports_check_mode = True
+        self._supports_async = True
+
+        result = super(CentreonActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        wrap_async = self._task.async_val and not self._connection.has_native_async
+        if wrap_async or not self._connection.transport.endswith('local'):
+            result.update(self._execute_module(task_vars=task_vars, wrap_async=wrap_async))
+            if not wrap_async:
+                self._remove_tmp_path(self._connection._shell.tmpdir)
+            return result
+
+        name = self._task.action.split('.')[-1]
+        result.update(run_module(name, self._task.args,
+                                 check_mode=self._play_context.check_mode,
+                                 diff=self._play_context.diff,
+                                 no_log=self._play_context.no_log))
+        return result
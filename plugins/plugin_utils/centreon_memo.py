@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import time
+
+from ansible_collections.community.centreon.plugins.module_utils import centreon_client
+
+DEFAULT_MEMO_TTL = 300
+DEFAULT_MEMO_SIZE = 10000
+
+
+class MemoCache(object):
+    """
+    LRU-bounded, TTL-expiring memo of API answers stored on local disk, so
+    that it is shared by the worker processes Ansible forks for each task.
+
+    Entries are read once with load(), served from memory, and the new or
+    used ones are merged back into the file by save().
+    """
+
+    def __init__(self, url, username, ttl=DEFAULT_MEMO_TTL, max_size=DEFAULT_MEMO_SIZE, path=None):
+        self.path = path or os.path.join(centreon_client.DEFAULT_CACHE_DIR,
+                                         'memo-%s.json' % centreon_client.cache_key(url, username))
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = dict()
+        self.touched = dict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts):
+        return json.dumps(parts)
+
+    def _valid(self, entry, now):
+        return entry is not None and entry['stored'] + self.ttl >= now
+
+    def load(self):
+        with centreon_client.locked_file(self.path, exclusive=False):
+            self.entries = centreon_client.read_json(self.path)
+        return self
+
+    def get(self, key, compute):
+        now = time.time()
+        entry = self.entries.get(key)
+        if self._valid(entry, now):
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = dict(stored=now, value=compute())
+            self.entries[key] = entry
+        entry['used'] = now
+        self.touched[key] = entry
+        return entry['value']
+
+    def save(self):
+        if not self.touched:
+            return
+        with centreon_client.locked_file(self.path):
+            now = time.time()
+            entries = centreon_client.read_json(self.path)
+            entries.update(self.touched)
+            entries = dict((k, v) for k, v in entries.items() if self._valid(v, now))
+            if len(entries) > self.max_size:
+                # Least recently used first
+                for k in sorted(entries, key=lambda k: entries[k].get('used', 0))[:len(entries) - self.max_size]:
+                    del entries[k]
+            centreon_client.write_json(self.path, entries)
+        self.touched = dict()
+
+    def clear(self):
+        with centreon_client.locked_file(self.path):
+            centreon_client.write_json(self.path, {})
+        self.entries = dict()
+        self.touched = dict()